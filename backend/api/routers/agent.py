@@ -1,32 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from src.db.mysql import get_db
 from api.services.agent import AgentService
+from src.cache import get_response_cache
 from api.schemas.agent import (
     AgentCreate, AgentUpdate, AgentResponse
 )
 from api.schemas.llm import LLMConfigResponse
 
 agent_router = APIRouter(prefix="/agent", tags=["agent"])
+# Communication responses embed their agents
+response_cache = get_response_cache()
 
 @agent_router.post("/create", response_model=AgentResponse)
-async def create_agent(agent_create: AgentCreate, db: Session = Depends(get_db)):
+async def create_agent(agent_create: AgentCreate, db: AsyncSession = Depends(get_db)):
     return await AgentService.create_agent(db, agent_create)
 
 @agent_router.get("/get/{agent_id}", response_model=AgentResponse)
-async def get_agent(agent_id: int, db: Session = Depends(get_db)):
+async def get_agent(agent_id: int, db: AsyncSession = Depends(get_db)):
     return await AgentService.get_agent(db, agent_id)
 
 @agent_router.get("/get-all", response_model=List[AgentResponse])
-async def get_all_agents(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return await AgentService.get_all_agents(db, skip, limit)
+async def get_all_agents(skip: int = 0, limit: int = 100, after_id: Optional[int] = None, db: AsyncSession = Depends(get_db)):
+    return await AgentService.get_all_agents(db, skip, limit, after_id=after_id)
 
 @agent_router.put("/update/{agent_id}", response_model=AgentResponse)
-async def update_agent(agent_id: int, agent_update: AgentUpdate, db: Session = Depends(get_db)):
+@response_cache.invalidates("communication")
+async def update_agent(agent_id: int, agent_update: AgentUpdate, db: AsyncSession = Depends(get_db)):
     return await AgentService.update_agent(db, agent_id, agent_update)
 
 @agent_router.delete("/delete/{agent_id}", response_model=bool)
-async def delete_agent(agent_id: int, db: Session = Depends(get_db)):
+@response_cache.invalidates("communication")
+async def delete_agent(agent_id: int, db: AsyncSession = Depends(get_db)):
     return await AgentService.hard_delete_agent(db, agent_id)
\ No newline at end of file
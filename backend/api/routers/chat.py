@@ -1,48 +1,82 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
 from src.db.mysql import get_db
 from api.services.chat import ChatService
+from src.cache import get_response_cache
 from api.schemas.chat import (
     ConversationCreate, ConversationUpdate, ConversationResponse,
     MessageCreate, MessageResponse,CommunicationConversationCreate
 )
 
 chat_router = APIRouter(prefix="/chat", tags=["chat"])
+response_cache = get_response_cache()
 
 @chat_router.post("/conversations/agent/create", response_model=ConversationResponse)
-async def create_conversation(conv_create: ConversationCreate, db: Session = Depends(get_db)):
+@response_cache.invalidates("conversation")
+async def create_conversation(conv_create: ConversationCreate, db: AsyncSession = Depends(get_db)):
     return await ChatService.create_conversation(db, conv_create)
 
-@chat_router.get("/conversations/agent/get-all", response_model=List[ConversationResponse])
-async def get_all_conversations(skip: int = 0, limit: int = 100, agent_id: Optional[int] = None, db: Session = Depends(get_db)):
-    return await ChatService.get_all_conversations(db, skip, limit, agent_id)
+@chat_router.get("/conversations/agent/get-all", response_model=List[ConversationResponse], response_model_exclude_none=True)
+@response_cache.cached("conversation", List[ConversationResponse], exclude_none=True)
+async def get_all_conversations(skip: int = 0, limit: int = 100, agent_id: Optional[int] = None, after_id: Optional[int] = None, db: AsyncSession = Depends(get_db)):
+    return await ChatService.get_all_conversations(db, skip, limit, agent_id, after_id)
 
 @chat_router.post("/conversations/communication/create", response_model=ConversationResponse)
+@response_cache.invalidates("conversation")
 async def create_communication_conversation(
     conv_create: CommunicationConversationCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     return await ChatService.create_communication_conversation(db, conv_create)
 
-@chat_router.get("/conversations/communication/get-all", response_model=List[ConversationResponse])
-async def get_all_communication_conversations(skip: int = 0, limit: int = 100, communication_id: Optional[int] = None, db: Session = Depends(get_db)):
-    return await ChatService.get_all_communication_conversations(db, skip, limit, communication_id)
+@chat_router.get("/conversations/communication/get-all", response_model=List[ConversationResponse], response_model_exclude_none=True)
+@response_cache.cached("conversation", List[ConversationResponse], exclude_none=True)
+async def get_all_communication_conversations(skip: int = 0, limit: int = 100, communication_id: Optional[int] = None, after_id: Optional[int] = None, db: AsyncSession = Depends(get_db)):
+    return await ChatService.get_all_communication_conversations(db, skip, limit, communication_id, after_id)
 
 
 @chat_router.get("/conversations/{conversation_id}", response_model=ConversationResponse)
-async def get_conversation(conversation_id: int, db: Session = Depends(get_db)):
+@response_cache.cached("conversation", ConversationResponse)
+async def get_conversation(conversation_id: int, db: AsyncSession = Depends(get_db)):
     return await ChatService.get_conversation(db, conversation_id)
 
 @chat_router.put("/conversations/{conversation_id}", response_model=ConversationResponse)
-async def update_conversation(conversation_id: int, conv_update: ConversationUpdate, db: Session = Depends(get_db)):
+@response_cache.invalidates("conversation")
+async def update_conversation(conversation_id: int, conv_update: ConversationUpdate, db: AsyncSession = Depends(get_db)):
     return await ChatService.update_conversation(db, conversation_id, conv_update)
 
 @chat_router.delete("/conversations/{conversation_id}", response_model=bool)
-async def delete_conversation(conversation_id: int, db: Session = Depends(get_db)):
+@response_cache.invalidates("conversation")
+async def delete_conversation(conversation_id: int, db: AsyncSession = Depends(get_db)):
     return await ChatService.delete_conversation(db, conversation_id)
 
 @chat_router.post("/chat", response_model=MessageResponse)
-async def add_message(message: MessageCreate, db: Session = Depends(get_db)):
-    return await ChatService.chat(db, message)
\ No newline at end of file
+@response_cache.invalidates("conversation")
+async def add_message(message: MessageCreate, db: AsyncSession = Depends(get_db)):
+    return await ChatService.chat(db, message)
+
+@chat_router.post("/chat/batch", response_model=List[MessageResponse])
+@response_cache.invalidates("conversation")
+async def add_messages(messages: List[MessageCreate], db: AsyncSession = Depends(get_db)):
+    """Store several messages at once without generating agent responses"""
+    return await ChatService.add_messages(db, messages)
+
+@chat_router.post("/chat/stream")
+async def stream_message(message: MessageCreate, db: AsyncSession = Depends(get_db)):
+    """Stream the agent response as Server-Sent Events"""
+    events = await ChatService.stream_chat(db, message)
+
+    async def stream_and_invalidate():
+        async for event in events:
+            yield event
+        # Messages are only stored at the end of the stream
+        response_cache.invalidate("conversation")
+
+    return StreamingResponse(
+        stream_and_invalidate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
 from src.db.mysql import get_db
 from api.services.communication import CommunicationService
+from src.cache import get_response_cache
 from api.schemas.communication import (
     CommunicationCreate, CommunicationUpdate,
     CommunicationResponse
@@ -12,38 +13,46 @@ from api.schemas.chat import ConversationResponse, MessageResponse
 from api.schemas.agent import AgentResponse
 
 communication_router = APIRouter(prefix="/communication", tags=["communication"])
+response_cache = get_response_cache()
 
 @communication_router.post("/create", response_model=CommunicationResponse)
+@response_cache.invalidates("communication")
 async def create_communication(
     comm_create: CommunicationCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     return await CommunicationService.create_communication(db, comm_create)
 
 @communication_router.get("/{communication_id}", response_model=CommunicationResponse)
-async def get_communication(communication_id: int, db: Session = Depends(get_db)):
+@response_cache.cached("communication", CommunicationResponse)
+async def get_communication(communication_id: int, db: AsyncSession = Depends(get_db)):
     return await CommunicationService.get_communication(db, communication_id)
 
 @communication_router.get("/", response_model=List[CommunicationResponse])
+@response_cache.cached("communication", List[CommunicationResponse])
 async def get_all_communications(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    return await CommunicationService.get_all_communications(db, skip, limit)
+    return await CommunicationService.get_all_communications(db, skip, limit, after_id=after_id)
 
 @communication_router.put("/{communication_id}", response_model=CommunicationResponse)
+@response_cache.invalidates("communication")
 async def update_communication(
     communication_id: int,
     comm_update: CommunicationUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     return await CommunicationService.update_communication(db, communication_id, comm_update)
 
 @communication_router.delete("/{communication_id}", response_model=bool)
-async def delete_communication(communication_id: int, db: Session = Depends(get_db)):
+@response_cache.invalidates("communication")
+async def delete_communication(communication_id: int, db: AsyncSession = Depends(get_db)):
     return await CommunicationService.delete_communication(db, communication_id)
 
 @communication_router.get("/{communication_id}/agents", response_model=List[AgentResponse])
-async def get_communication_agents(communication_id: int, db: Session = Depends(get_db)):
+@response_cache.cached("communication", List[AgentResponse])
+async def get_communication_agents(communication_id: int, db: AsyncSession = Depends(get_db)):
     return await CommunicationService.get_communication_agents(db, communication_id)
\ No newline at end of file
@@ -1,130 +1,186 @@
-import json
+import os
+from tempfile import SpooledTemporaryFile
 from typing import List, Dict
-from fastapi import APIRouter, Form, UploadFile, File, HTTPException, Depends
-from jsonschema import ValidationError
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Form, Request, UploadFile, File, HTTPException, Depends
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config import Settings
 from src.db.mysql import get_db
 from api.services.kb import KnowledgeBaseService
+from src.cache import get_response_cache
 from api.schemas.kb import (
     QueryRequest,
+    QueryResponse,
     KnowledgeBaseCreate,
     KnowledgeBaseUpdate,
     KnowledgeBaseResponse,
     DocumentCreate,
-    DocumentResponse
+    DocumentResponse,
+    DocumentsDelete
 )
 
 kb_router = APIRouter(prefix="/kb", tags=["kb"])
+response_cache = get_response_cache()
 
-# Dependency to get KB service
-async def get_kb_service():
-    settings = Settings()
-    return KnowledgeBaseService(settings)
+ALLOWED_EXTENSIONS = {".pdf", ".txt", ".doc", ".docx"}
+
+ALLOWED_CONTENT_TYPES = {
+    "application/pdf",
+    "text/plain",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    # Sent by clients that cannot detect the type, the extension check still applies
+    "application/octet-stream",
+}
+
+# Dependency to get KB service, created once per worker in the app lifespan
+async def get_kb_service(request: Request) -> KnowledgeBaseService:
+    return request.app.state.kb_service
+
+async def spool_upload(file: UploadFile, max_file_size: int) -> SpooledTemporaryFile:
+    """
+    Copy an upload of unknown size into a SpooledTemporaryFile (in memory up to
+    5MB, larger files spill to disk), enforcing the size limit while copying
+    """
+    file_size = 0
+    chunk_size = 1024 * 1024  # 1MB chunks
+    buffer = SpooledTemporaryFile(max_size=5 * 1024 * 1024)
+    try:
+        while chunk := await file.read(chunk_size):
+            file_size += len(chunk)
+            if file_size > max_file_size:
+                raise HTTPException(413, f"File too large. Maximum size: {max_file_size/1024/1024}MB")
+            buffer.write(chunk)
+    except BaseException:
+        buffer.close()
+        raise
+    return buffer
 
 @kb_router.post("/", response_model=KnowledgeBaseResponse)
+@response_cache.invalidates("kb")
 async def create_knowledge_base(
     kb_data: KnowledgeBaseCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     kb_service: KnowledgeBaseService = Depends(get_kb_service)
 ):
     """Create a new knowledge base with RAG configuration"""
     return await kb_service.create_knowledge_base(db, kb_data)
 
 @kb_router.put("/{kb_id}", response_model=KnowledgeBaseResponse)
+@response_cache.invalidates("kb", "communication")
 async def update_knowledge_base(
     kb_id: int,
     kb_data: KnowledgeBaseUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     kb_service: KnowledgeBaseService = Depends(get_kb_service)
 ):
     """Update an existing knowledge base"""
     return await kb_service.update_knowledge_base(db, kb_id, kb_data)
 
-@kb_router.get("/", response_model=List[KnowledgeBaseResponse])
+@kb_router.get("/", response_model=List[KnowledgeBaseResponse], response_model_exclude_none=True)
+@response_cache.cached("kb", List[KnowledgeBaseResponse], exclude_none=True)
 async def list_knowledge_bases(
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     kb_service: KnowledgeBaseService = Depends(get_kb_service)
 ):
     """List all knowledge bases"""
     return await kb_service.list_knowledge_bases(db, skip, limit)
 
+@kb_router.get("/cache/stats")
+async def get_query_cache_stats(
+    kb_service: KnowledgeBaseService = Depends(get_kb_service)
+):
+    """Get hit/miss statistics of the query result cache"""
+    return kb_service.query_cache.stats()
+
 @kb_router.get("/{kb_id}", response_model=KnowledgeBaseResponse)
+@response_cache.cached("kb", KnowledgeBaseResponse)
 async def get_knowledge_base(
     kb_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     kb_service: KnowledgeBaseService = Depends(get_kb_service)
 ):
     """Get a specific knowledge base"""
     return await kb_service.get_knowledge_base(db, kb_id)
 
 @kb_router.delete("/{kb_id}")
+@response_cache.invalidates("kb", "communication")
 async def delete_knowledge_base(
     kb_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     kb_service: KnowledgeBaseService = Depends(get_kb_service)
 ):
     """Delete a knowledge base and all its documents"""
     return await kb_service.delete_knowledge_base(db, kb_id)
 
-@kb_router.get("/{kb_id}/documents", response_model=List[DocumentResponse])
+@kb_router.post("/{kb_id}/query", response_model=QueryResponse)
+async def query_documents(
+    kb_id: int,
+    query_request: QueryRequest,
+    db: AsyncSession = Depends(get_db),
+    kb_service: KnowledgeBaseService = Depends(get_kb_service)
+):
+    """Query the documents of a knowledge base"""
+    return await kb_service.query_documents(db, kb_id, query_request)
+
+@kb_router.get("/{kb_id}/documents", response_model=List[DocumentResponse], response_model_exclude_none=True)
+@response_cache.cached("kb", List[DocumentResponse], exclude_none=True)
 async def get_documents(
     kb_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     kb_service: KnowledgeBaseService = Depends(get_kb_service)
 ):
     """Get all documents for a specific knowledge base"""
     return await kb_service.get_documents_by_kb(db, kb_id)
 
 @kb_router.post("/{kb_id}/documents", response_model=DocumentResponse)
+@response_cache.invalidates("kb")
 async def upload_document(
     kb_id: int,
     doc_data: str = Form(...),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     kb_service: KnowledgeBaseService = Depends(get_kb_service)
 ):
     """Upload a document for a specific knowledge base"""
-    # Validate file type and size
-    allowed_extensions = ('.pdf', '.txt', '.doc', '.docx')
-    max_file_size = 50 * 1024 * 1024  # 50MB limit
-    
-    if not file.filename.lower().endswith(allowed_extensions):
-        raise HTTPException(400, f"Unsupported file type. Allowed types: {allowed_extensions}")
+    # Validate file type and size before touching the body
+    max_file_size = kb_service.settings.MAX_UPLOAD_BYTES
+    # Only the suffix is lowercased, then a single set lookup
+    extension = os.path.splitext(file.filename)[1].lower()
     
-    # Check file size
-    file_size = 0
-    content = bytearray()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(400, f"Unsupported file type. Allowed types: {sorted(ALLOWED_EXTENSIONS)}")
+    if file.content_type not in ALLOWED_CONTENT_TYPES:
+        raise HTTPException(415, f"Unsupported content type: {file.content_type}")
+    if file.size is not None and file.size > max_file_size:
+        raise HTTPException(413, f"File too large. Maximum size: {max_file_size/1024/1024}MB")
     
-    # Read file in chunks to handle large files
-    chunk_size = 1024 * 1024  # 1MB chunks
-    while True:
-        chunk = await file.read(chunk_size)
-        if not chunk:
-            break
-        file_size += len(chunk)
-        if file_size > max_file_size:
-            raise HTTPException(400, f"File too large. Maximum size: {max_file_size/1024/1024}MB")
-        content.extend(chunk)
-        
+    # Parse and validate the JSON string before any bytes are copied
     try:
-        # Parse and validate the JSON string
-        try:
-            doc_data_dict = json.loads(doc_data)
-            doc_data_obj = DocumentCreate(**doc_data_dict)
-        except json.JSONDecodeError:
+        doc_data_obj = DocumentCreate.model_validate_json(doc_data)
+    except ValidationError as e:
+        if any(error["type"] == "json_invalid" for error in e.errors()):
             raise HTTPException(400, "Invalid JSON format in doc_data")
-        except ValidationError as e:
-            raise HTTPException(400, f"Invalid document data: {str(e)}")
+        raise HTTPException(400, f"Invalid document data: {str(e)}")
+    
+    # The multipart parser already spooled the body and measured it, hand its
+    # file straight to the S3 upload. Without a known size the body is copied
+    # (in memory up to 5MB, larger files spill to disk) to enforce the limit
+    buffer = None
+    try:
+        if file.size is not None:
+            upload = file.file
+        else:
+            buffer = upload = await spool_upload(file, max_file_size)
+        upload.seek(0)
         
         return await kb_service.create_document(
             session=db,
             kb_id=kb_id,
             doc_data=doc_data_obj,
-            file_content=bytes(content),
+            file=upload,
             filename=file.filename
         )
             
@@ -132,27 +188,40 @@ async def upload_document(
         raise e
     except Exception as e:
         raise HTTPException(500, "Internal server error during document upload")
+    finally:
+        if buffer is not None:
+            buffer.close()
 
-@kb_router.post("/{kb_id}/documents/{doc_id}/process", response_model=DocumentResponse)
+@kb_router.post("/{kb_id}/documents/{doc_id}/process", response_model=DocumentResponse, status_code=202)
+@response_cache.invalidates("kb")
 async def process_document(
     kb_id: int,
     doc_id: int,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
     kb_service: KnowledgeBaseService = Depends(get_kb_service)
 ):
-    """Process an uploaded document"""
+    """Start processing an uploaded document, its status tracks the progress"""
+    async def process_in_background():
+        await kb_service.process_document_in_background(kb_id, doc_id)
+        # The document list changed status once more
+        response_cache.invalidate("kb")
+
     try:
-        return await kb_service.process_document(kb_id, doc_id, db)
+        document = await kb_service.start_document_processing(db, kb_id, doc_id)
+        background_tasks.add_task(process_in_background)
+        return document
     except HTTPException as e:
         raise e
     except Exception as e:
         raise HTTPException(500, "Internal server error during document processing")
 
 @kb_router.delete("/{kb_id}/documents/{document_id}")
+@response_cache.invalidates("kb")
 async def delete_document(
     kb_id: int,
     document_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     kb_service: KnowledgeBaseService = Depends(get_kb_service)
 ):
     """Delete a document from a knowledge base"""
@@ -165,4 +234,24 @@ async def delete_document(
     except HTTPException as e:
         raise e
     except Exception as e:
-        raise HTTPException(500, str(e))
\ No newline at end of file
+        raise HTTPException(500, str(e))
+
+@kb_router.delete("/{kb_id}/documents")
+@response_cache.invalidates("kb")
+async def delete_documents(
+    kb_id: int,
+    documents_delete: DocumentsDelete,
+    db: AsyncSession = Depends(get_db),
+    kb_service: KnowledgeBaseService = Depends(get_kb_service)
+):
+    """Delete several documents from a knowledge base at once"""
+    try:
+        return await kb_service.delete_documents(
+            session=db,
+            kb_id=kb_id,
+            document_ids=documents_delete.document_ids
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(500, str(e))
@@ -1,9 +1,10 @@
 # src/routers/llm.py
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from src.db.mysql import get_db
 from api.services.llm import LLMService
+from src.cache import get_response_cache
 from api.schemas.llm import (
     LLMFoundationCreate,
     LLMFoundationUpdate,
@@ -15,47 +16,53 @@ from api.schemas.llm import (
 )
 
 llm_router = APIRouter(prefix="/llm", tags=["llm"])
+response_cache = get_response_cache()
 
 # LLM Foundation endpoints
 @llm_router.post("/foundations/create", response_model=LLMFoundationResponse)
+@response_cache.invalidates("llm")
 async def create_llm_foundation(
     foundation: LLMFoundationCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new LLM Foundation"""
     return await LLMService.create_foundation(db, foundation)
 
-@llm_router.get("/foundations/get", response_model=List[LLMFoundationResponse])
+@llm_router.get("/foundations/get", response_model=List[LLMFoundationResponse], response_model_exclude_none=True)
+@response_cache.cached("llm", List[LLMFoundationResponse], exclude_none=True)
 async def get_llm_foundations(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     provider: Optional[LLMProvider] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all LLM Foundations with optional filtering by provider"""
     return await LLMService.get_all_foundations(db, skip, limit, provider)
 
 @llm_router.get("/foundations/get/{foundation_id}", response_model=LLMFoundationResponse)
+@response_cache.cached("llm", LLMFoundationResponse)
 async def get_llm_foundation(
     foundation_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific LLM Foundation by ID"""
     return await LLMService.get_foundation(db, foundation_id)
 
 @llm_router.put("/foundations/update/{foundation_id}", response_model=LLMFoundationResponse)
+@response_cache.invalidates("llm")
 async def update_llm_foundation(
     foundation_id: int,
     foundation: LLMFoundationUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an existing LLM Foundation"""
     return await LLMService.update_foundation(db, foundation_id, foundation)
 
 @llm_router.delete("/foundations/delete/{foundation_id}")
+@response_cache.invalidates("llm")
 async def delete_llm_foundation(
     foundation_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete an LLM Foundation"""
     await LLMService.delete_foundation(db, foundation_id)
@@ -63,44 +70,49 @@ async def delete_llm_foundation(
 
 # LLM Config endpoints
 @llm_router.post("/configs/create", response_model=LLMConfigResponse)
+@response_cache.invalidates("llm")
 async def create_llm_config(
     config: LLMConfigCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new LLM Config"""
     return await LLMService.create_config(db, config)
 
 @llm_router.get("/configs/get/{config_id}", response_model=LLMConfigResponse)
+@response_cache.cached("llm", LLMConfigResponse)
 async def get_llm_config(
     config_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific LLM Config by ID"""
     return await LLMService.get_config(db, config_id)
 
 @llm_router.get("/foundations/{foundation_id}/configs", response_model=List[LLMConfigResponse])
+@response_cache.cached("llm", List[LLMConfigResponse])
 async def get_configs_by_foundation(
     foundation_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all LLM Configs for a specific foundation"""
     return await LLMService.get_configs_by_foundation(db, foundation_id, skip, limit)
 
 @llm_router.put("/configs/update/{config_id}", response_model=LLMConfigResponse)
+@response_cache.invalidates("llm")
 async def update_llm_config(
     config_id: int,
     config: LLMConfigUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an existing LLM Config"""
     return await LLMService.update_config(db, config_id, config)
 
 @llm_router.delete("/configs/delete/{config_id}")
+@response_cache.invalidates("llm")
 async def delete_llm_config(
     config_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete an LLM Config"""
     await LLMService.delete_config(db, config_id)
@@ -12,25 +12,23 @@ class ConversationUpdate(BaseModel):
     title: Optional[str] = None
     is_active: Optional[bool] = None
 
+class MessageResponse(BaseModel):
+    id: int
+    conversation_id: int
+    role: str
+    content: str
+    created_at: datetime
+
 class ConversationResponse(BaseModel):
     id: int
     title: Optional[str]
     created_at: datetime
     updated_at: Optional[datetime]
     is_active: bool
-    messages: List["MessageResponse"]
+    messages: List[MessageResponse]
 
 class MessageCreate(BaseModel):
     conversation_id: int
     role: str
     content: str
     type: MessageType
-
-class MessageResponse(BaseModel):
-    id: int
-    conversation_id: int
-    role: str
-    content: str
-    created_at: datetime
-
-ConversationResponse.update_forward_refs()
\ No newline at end of file
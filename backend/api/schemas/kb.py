@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
 from src.db.models import DocumentStatus, RAGType
@@ -58,7 +58,14 @@ class DocumentResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime]
 
+class DocumentsDelete(BaseModel):
+    document_ids: List[int] = Field(min_length=1)
+
 class QueryRequest(BaseModel):
     query: str
-    collection_name: str
-    limit: Optional[int] = 5
\ No newline at end of file
+    collection_name: Optional[str] = None  # Only the knowledge base collection is accepted
+    limit: Optional[int] = 5
+
+class QueryResponse(BaseModel):
+    query: str
+    response: str
@@ -1,15 +1,27 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, exists, insert, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from src.db.models import Agent, AgentKnowledgeBase, KnowledgeBase, LLMConfig, LLMFoundation, AgentConversation
+from src.db.models import (
+    Agent, AgentKnowledgeBase, AgentTool, KnowledgeBase, LLMConfig, LLMFoundation,
+    AgentConversation, CommunicationAgentMember, Conversation
+)
+from src.db.loaders import LoadGenerator
+from api.services.chat import ChatService, CONVERSATION_LOAD_OPTIONS
 from api.schemas.agent import AgentCreate, AgentUpdate, AgentResponse
 
+# Relationships serialized in AgentResponse, loaded with one query each
+# instead of one lazy load per agent
+AGENT_LOAD_OPTIONS = LoadGenerator.from_schema(Agent, AgentResponse)
+# Read-only listings also skip the columns AgentResponse does not serialize
+AGENT_LIST_LOAD_OPTIONS = LoadGenerator.from_schema(Agent, AgentResponse, only_columns=True)
+
 class AgentService:
     @staticmethod
-    async def create_agent(db: Session, agent_create: AgentCreate) -> Agent:
+    async def create_agent(db: AsyncSession, agent_create: AgentCreate) -> Agent:
         try:
             # Create new agent instance
             agent = Agent(
@@ -20,157 +32,221 @@ class AgentService:
                 tools=agent_create.tools or []
             )
             
-            # If foundation_id is provided, verify it exists
+            # If foundation_id is provided, verify it exists (SELECT EXISTS, no row is loaded)
             if agent_create.foundation_id:
-                foundation = db.query(LLMFoundation).filter(
-                    LLMFoundation.id == agent_create.foundation_id,
-                    LLMFoundation.is_active == True
-                ).first()
-                if not foundation:
+                foundation_exists = await db.scalar(
+                    select(exists().where(
+                        LLMFoundation.id == agent_create.foundation_id,
+                        LLMFoundation.is_active == True
+                    ))
+                )
+                if not foundation_exists:
                     raise HTTPException(status_code=404, detail="LLM Foundation not found")
                 agent.foundation_id = agent_create.foundation_id
             
             # If config_id is provided, verify it exists
             if agent_create.config_id:
-                config = db.query(LLMConfig).filter(
-                    LLMConfig.id == agent_create.config_id
-                ).first()
-                if not config:
+                config_exists = await db.scalar(
+                    select(exists().where(LLMConfig.id == agent_create.config_id))
+                )
+                if not config_exists:
                     raise HTTPException(status_code=404, detail="LLM Config not found")
                 agent.config_id = agent_create.config_id
 
                 # Check if all knowledge base IDs exist
             if agent_create.kb_ids and len(agent_create.kb_ids) > 0:
-                kb_count = db.query(KnowledgeBase).filter(
-                    KnowledgeBase.id.in_(agent_create.kb_ids),
-                    KnowledgeBase.is_active == True
-                ).count()
+                found_kb_ids = set(await db.scalars(
+                    select(KnowledgeBase.id).where(
+                        KnowledgeBase.id.in_(agent_create.kb_ids),
+                        KnowledgeBase.is_active == True
+                    )
+                ))
                 
-                if kb_count != len(agent_create.kb_ids):
-                    raise HTTPException(status_code=404, detail="One or more Knowledge Bases not found")
+                missing_kb_ids = set(agent_create.kb_ids) - found_kb_ids
+                if missing_kb_ids:
+                    raise HTTPException(status_code=404, detail=f"Knowledge Bases not found: {sorted(missing_kb_ids)}")
              
             db.add(agent)
-            db.flush()   
-            # Now add relationships to knowledge bases
+            await db.flush()   
+            # Now add relationships to knowledge bases, in a single executemany INSERT
             if agent_create.kb_ids and len(agent_create.kb_ids) > 0:
-                for kb_id in agent_create.kb_ids:
-                    agent_kb = AgentKnowledgeBase(
-                        agent_id=agent.id,
-                        knowledge_base_id=kb_id
-                    )
-                    db.add(agent_kb)
+                await db.execute(
+                    insert(AgentKnowledgeBase),
+                    [{"agent_id": agent.id, "knowledge_base_id": kb_id} for kb_id in dict.fromkeys(agent_create.kb_ids)]
+                )
                     
-            db.commit()
-            db.refresh(agent)
-            return agent
+            await db.commit()
+            return await AgentService.get_agent(db, agent.id)
         except IntegrityError as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=400, detail="Invalid data provided")
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=500, detail=str(e))
 
     @staticmethod
-    async def get_agent(db: Session, agent_id: int) -> Optional[AgentResponse]:
-        agent = db.query(Agent).filter(
-            Agent.id == agent_id,
-            Agent.is_active == True
-        ).first()
+    async def get_agent(db: AsyncSession, agent_id: int) -> Optional[AgentResponse]:
+        agent = await db.scalar(
+            select(Agent)
+            .options(*AGENT_LOAD_OPTIONS)
+            .where(
+                Agent.id == agent_id,
+                Agent.is_active == True
+            )
+            .execution_options(populate_existing=True)
+        )
         if not agent:
             raise HTTPException(status_code=404, detail="Agent not found")
         return agent
 
     @staticmethod
     async def get_all_agents(
-        db: Session,
+        db: AsyncSession,
         skip: int = 0,
         limit: int = 100,
-        include_inactive: bool = False
+        include_inactive: bool = False,
+        after_id: Optional[int] = None
     ) -> List[Agent]:
-        query = db.query(Agent)
+        query = select(Agent).options(*AGENT_LIST_LOAD_OPTIONS).order_by(Agent.id).limit(limit)
         if not include_inactive:
-            query = query.filter(Agent.is_active == True)
-        return query.offset(skip).limit(limit).all()
+            query = query.where(Agent.is_active == True)
+        # Keyset pagination seeks straight to the page, OFFSET reads and drops `skip` rows
+        if after_id is not None:
+            query = query.where(Agent.id > after_id)
+        else:
+            query = query.offset(skip)
+        result = await db.scalars(query)
+        return result.all()
 
     @staticmethod
-    async def update_agent(db: Session, agent_id: int, agent_update: AgentUpdate) -> Agent:
+    async def update_agent(db: AsyncSession, agent_id: int, agent_update: AgentUpdate) -> Agent:
         try:
             agent = await AgentService.get_agent(db, agent_id)
             if not agent:
                 raise HTTPException(status_code=404, detail="Agent not found")
 
-            update_data = agent_update.dict(exclude_unset=True)
+            update_data = agent_update.model_dump(exclude_unset=True)
 
             # Kiểm tra foundation_id nếu có
             if 'foundation_id' in update_data:
-                foundation = db.query(LLMFoundation).filter(
-                    LLMFoundation.id == update_data['foundation_id'],
-                    LLMFoundation.is_active == True
-                ).first()
-                if not foundation:
+                foundation_exists = await db.scalar(
+                    select(exists().where(
+                        LLMFoundation.id == update_data['foundation_id'],
+                        LLMFoundation.is_active == True
+                    ))
+                )
+                if not foundation_exists:
                     raise HTTPException(status_code=404, detail="LLM Foundation not found")
 
             # Kiểm tra config_id nếu có
             if 'config_id' in update_data:
-                config = db.query(LLMConfig).filter(
-                    LLMConfig.id == update_data['config_id']
-                ).first()
-                if not config:
+                config_exists = await db.scalar(
+                    select(exists().where(LLMConfig.id == update_data['config_id']))
+                )
+                if not config_exists:
                     raise HTTPException(status_code=404, detail="LLM Config not found")
 
             # Xử lý cập nhật kb_ids
             if 'kb_ids' in update_data:
-                new_kb_ids = set(update_data.pop('kb_ids'))
-                
-                # Xóa tất cả các bản ghi cũ
-                db.query(AgentKnowledgeBase).filter(AgentKnowledgeBase.agent_id == agent_id).delete()
+                new_kb_ids = set(update_data.pop('kb_ids') or [])
+                # knowledge_bases is already loaded by get_agent
+                existing_kb_ids = {kb.id for kb in agent.knowledge_bases}
+                removed_kb_ids = existing_kb_ids - new_kb_ids
+                added_kb_ids = new_kb_ids - existing_kb_ids
+
+                # Chỉ xóa các bản ghi bị bỏ đi
+                if removed_kb_ids:
+                    await db.execute(
+                        delete(AgentKnowledgeBase).where(
+                            AgentKnowledgeBase.agent_id == agent_id,
+                            AgentKnowledgeBase.knowledge_base_id.in_(removed_kb_ids)
+                        ).execution_options(synchronize_session=False)
+                    )
 
-                # Thêm các bản ghi mới
-                for kb_id in new_kb_ids:
-                    db.add(AgentKnowledgeBase(agent_id=agent_id, knowledge_base_id=kb_id))
+                # Chỉ thêm các bản ghi mới
+                if added_kb_ids:
+                    await db.execute(
+                        insert(AgentKnowledgeBase),
+                        [{"agent_id": agent_id, "knowledge_base_id": kb_id} for kb_id in added_kb_ids]
+                    )
 
             # Cập nhật các trường còn lại
             for field, value in update_data.items():
                 setattr(agent, field, value)
-
-            db.commit()
-            db.refresh(agent)
+            # Set on the client so the commit leaves nothing expired to re-SELECT
+            agent.updated_at = datetime.utcnow()
+
+            await db.commit()
+            ChatService.invalidate_agents()
+            if 'kb_ids' in agent_update.model_fields_set:
+                # The links were changed with Core statements, reload knowledge_bases
+                await db.refresh(agent, ["knowledge_bases"])
             return agent
 
         except IntegrityError:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=400, detail="Invalid data provided")
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=500, detail=str(e))
 
     @staticmethod
-    async def delete_agent(db: Session, agent_id: int) -> bool:
+    async def delete_agent(db: AsyncSession, agent_id: int) -> bool:
+        # Primary key lookup through the identity map, relationships are not needed here
+        agent = await db.get(Agent, agent_id)
+        if not agent or not agent.is_active:
+            raise HTTPException(status_code=404, detail="Agent not found")
         try:
-            agent = await AgentService.get_agent(db, agent_id)
             agent.is_active = False  # Soft delete
-            db.commit()
+            await db.commit()
+            ChatService.invalidate_agents()
             return True
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=500, detail=str(e))
 
     @staticmethod
-    async def hard_delete_agent(db: Session, agent_id: int) -> bool:
+    async def hard_delete_agent(db: AsyncSession, agent_id: int) -> bool:
         try:
-            agent = await AgentService.get_agent(db, agent_id)
-            # Delete related conversations
-            db.query(AgentConversation).filter(
-                AgentConversation.agent_id == agent_id
-            ).delete()
-            
-            db.delete(agent)
-            db.commit()
+            # Delete the link rows and the agent without loading them. The link
+            # FKs cascade on new schemas, tables created before still need this.
+            # None of the deleted rows are used afterwards, so the session is not
+            # scanned for matching objects to synchronize
+            for link_model in (AgentConversation, AgentKnowledgeBase, AgentTool, CommunicationAgentMember):
+                await db.execute(
+                    delete(link_model)
+                    .where(link_model.agent_id == agent_id)
+                    .execution_options(synchronize_session=False)
+                )
+            result = await db.execute(
+                delete(Agent)
+                .where(Agent.id == agent_id, Agent.is_active == True)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                raise HTTPException(status_code=404, detail="Agent not found")
+            await db.commit()
+            ChatService.invalidate_agents()
             return True
+        except HTTPException:
+            await db.rollback()
+            raise
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=500, detail=str(e))
     @staticmethod
-    async def get_agent_conversations(db: Session, agent_id: int) -> List[AgentConversation]:
-        agent = await AgentService.get_agent(db, agent_id)
-        return agent.conversations
\ No newline at end of file
+    async def get_agent_conversations(db: AsyncSession, agent_id: int) -> List[Conversation]:
+        # Only the agent's existence matters, not its row and relationships
+        agent_exists = await db.scalar(
+            select(exists().where(Agent.id == agent_id, Agent.is_active == True))
+        )
+        if not agent_exists:
+            raise HTTPException(status_code=404, detail="Agent not found")
+        # Conversations and their messages in two queries, whatever the number of conversations
+        result = await db.scalars(
+            select(Conversation)
+            .options(*CONVERSATION_LOAD_OPTIONS)
+            .join(AgentConversation)
+            .where(AgentConversation.agent_id == agent_id)
+        )
+        return result.all()
\ No newline at end of file
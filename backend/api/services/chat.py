@@ -1,10 +1,18 @@
-from sqlalchemy.orm import Session
+from cachetools import LRUCache, TTLCache
+from sqlalchemy import Select, exists, lambda_stmt, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 from fastapi import HTTPException
-from typing import List, Optional, Dict, Any
+import asyncio
+import hashlib
+import json
+import threading
+from typing import AsyncGenerator, List, Optional, Dict, Any, Tuple
 from datetime import datetime
-from llama_index.core.llms import ChatMessage
-from src.db.models import KnowledgeBase, RoleType,Conversation, Message,AgentType, AgentConversation, Agent, LLMConfig, LLMProvider, Communication, CommunicationConversation, MessageType
+from llama_index.core.llms import ChatMessage, MessageRole
+from src.db.mysql import AsyncSessionLocal
+from src.db.models import KnowledgeBase, RoleType,Conversation, Message,AgentType, AgentConversation, Agent, LLMConfig, LLMProvider, Communication, CommunicationConversation, CommunicationAgentMember, MessageType
 from api.schemas.chat import (
     CommunicationConversationCreate, ConversationCreate, ConversationUpdate, ConversationResponse,
     MessageCreate, MessageResponse
@@ -12,6 +20,51 @@ from api.schemas.chat import (
 from src.agents import ReActAgent, AgentOptions, ReflectionAgent, ManagerAgent, BaseAgent
 from src.llm import UnifiedLLM # Import other LLM providers as needed
 from src.tools.tool_manager import tool_manager
+from src.cache import SingleFlight
+from src.db.loaders import LoadGenerator
+from src.config import get_settings
+from src.logger import get_formatted_logger
+
+logger = get_formatted_logger(__file__)
+
+# Conversation.messages is part of ConversationResponse, load it with the conversations
+CONVERSATION_LOAD_OPTIONS = (selectinload(Conversation.messages),)
+# Read-only listings also skip the columns ConversationResponse does not serialize
+CONVERSATION_LIST_LOAD_OPTIONS = LoadGenerator.from_schema(Conversation, ConversationResponse, only_columns=True)
+
+# Everything build_agent reads: many-to-one LLM config/foundation joined into the
+# agent SELECT, knowledge bases and their RAG configs selectin loaded
+AGENT_SETUP_LOAD_OPTIONS = (
+    selectinload(Agent.knowledge_bases).selectinload(KnowledgeBase.rag_config),
+    joinedload(Agent.llm_configs).joinedload(LLMConfig.llm_foundations),
+)
+
+# Built agents keep no per-conversation state, reuse them across messages.
+# Keyed on (agent id, config id, updated_at), managers on their communication and
+# member versions, writes elsewhere call invalidate_agents
+agent_cache: TTLCache = TTLCache(maxsize=512, ttl=300)
+
+# Agent calls in flight, keyed like answer_cache. Only the LLM call is shared,
+# never a request's session or stored messages
+chat_flight = SingleFlight()
+
+# Stored message roles as chat history roles, anything else is replayed as the assistant
+CHAT_ROLES = {RoleType.USER: MessageRole.USER, RoleType.ASSISTANT: MessageRole.ASSISTANT}
+
+# Agent ids are their name without spaces
+STRIP_SPACES = str.maketrans("", "", " ")
+
+# Answers to the same question, asked to the same agent after the same history.
+# Keyed on (agent key, query, history) hashes, cleared with the built agents and
+# whenever knowledge base documents change. Per worker, see ChatCacheConfig
+chat_cache_config = get_settings().CHAT_CACHE_CONFIG
+answer_cache: TTLCache = TTLCache(maxsize=chat_cache_config.maxsize, ttl=chat_cache_config.ttl)
+
+# LLM clients hold no conversation state, share one per distinct setting instead
+# of opening a new client (and re-reading credentials) for every built agent
+llm_cache: LRUCache = LRUCache(maxsize=128)
+# Agents of a communication are built in worker threads
+llm_cache_lock = threading.Lock()
 
 class ChatService:
     @staticmethod
@@ -19,7 +72,7 @@ class ChatService:
         """Create LLM instance based on provider and config"""
         provider = llm_config.llm_foundations.provider
         if provider == LLMProvider.GEMINI:
-            return UnifiedLLM(
+            return ChatService.get_llm(
                 model_name= LLMProvider.GEMINI.value,
                 model_id= llm_config.llm_foundations.model_id,
                 temperature= llm_config.temperature,
@@ -30,13 +83,20 @@ class ChatService:
         raise HTTPException(status_code=400, detail=f"Unsupported LLM provider: {provider}")
 
     @staticmethod
-    async def setup_agent(db: Session, agent_id: int) -> BaseAgent:
-        """Setup agent with specified LLM config"""
-        # Get agent and config
-        agent = db.query(Agent).filter(Agent.id == agent_id).first()
-        if not agent:
-            raise HTTPException(status_code=404, detail="Agent not found")
-        
+    def get_llm(**llm_kwargs: Any) -> UnifiedLLM:
+        """Get the shared UnifiedLLM built with these arguments, creating it on first use"""
+        key = tuple(sorted(llm_kwargs.items()))
+        with llm_cache_lock:
+            llm = llm_cache.get(key)
+        if llm is None:
+            llm = UnifiedLLM(**llm_kwargs)
+            with llm_cache_lock:
+                llm = llm_cache.setdefault(key, llm)
+        return llm
+
+    @staticmethod
+    def build_agent(agent: Agent) -> BaseAgent:
+        """Build the agent from a row loaded with AGENT_SETUP_LOAD_OPTIONS"""
         # setup agent with kb rag config setup multi tool
         kbs : List[KnowledgeBase] = agent.knowledge_bases    
         from src.tools.rag_tool import RAGToolManager
@@ -45,47 +105,119 @@ class ChatService:
         
         tools = rag_tools + simple_tools
 
-        llm_config = db.query(LLMConfig).filter(LLMConfig.id == agent.config_id).first()
+        llm_config = agent.llm_configs
         if not llm_config:
             raise HTTPException(status_code=404, detail="LLM config not found")
 
         # Create LLM instance
         llm = ChatService.create_llm_instance(llm_config)
 
+        options = AgentOptions(
+            id=f"{str(agent.name).translate(STRIP_SPACES).lower()}{agent.id}",
+            name=agent.name,
+            description=agent.description
+        )
         # Create and return agent
-        if agent.agent_type == AgentType.REFLECTION:
-            return ReflectionAgent(
-                llm=llm,
-                options=AgentOptions(
-                    id=f"{"".join(str(agent.name).split(" ")).lower()}{agent.id}",
-                    name=agent.name,
-                    description=agent.description
-                ),
-                system_prompt=llm_config.system_prompt,
-                tools=tools
-            )
-        else:
-            return ReActAgent(
-                llm=llm,
-                options=AgentOptions(
-                    id=f"{"".join(str(agent.name).split(" ")).lower()}{agent.id}",
-                    name=agent.name,
-                    description=agent.description
-                ),
-                system_prompt=llm_config.system_prompt,
-                tools=tools
-            )
+        agent_class = ReflectionAgent if agent.agent_type == AgentType.REFLECTION else ReActAgent
+        return agent_class(
+            llm=llm,
+            options=options,
+            system_prompt=llm_config.system_prompt,
+            tools=tools
+        )
+
+    @staticmethod
+    def invalidate_agents() -> None:
+        """Drop the built agents, e.g. after an agent, its LLM config or a knowledge base changed"""
+        from src.tools.rag_tool import RAGToolManager
+        agent_cache.clear()
+        answer_cache.clear()
+        RAGToolManager.clear_cache()
+
+    @staticmethod
+    def invalidate_answers() -> None:
+        """Drop the cached answers, e.g. after documents of a knowledge base changed"""
+        answer_cache.clear()
+
+    @staticmethod
+    def answers_are_cacheable(agent: BaseAgent) -> bool:
+        """
+        Whether the agent's answers only depend on data whose changes clear
+        answer_cache: every tool of the agent, and of the agents a manager
+        routes to, searches a knowledge base. Other tools (e.g. get_weather)
+        return time-varying results
+        """
+        from src.tools.rag_tool import RAGToolManager
+        agents = [agent, *agent.agent_registry.values()] if isinstance(agent, ManagerAgent) else [agent]
+        return all(RAGToolManager.is_rag_tool(tool) for member in agents for tool in member.tools)
+
+    @staticmethod
+    def make_answer_key(agent_key: Tuple[str, int], query: str, chat_history: List[ChatMessage]) -> str:
+        """Build the answer cache key from the agent, the normalized query and the history it follows"""
+        history = "|".join(f"{m.role.value}:{m.content}" for m in chat_history)
+        parts = f"{agent_key}|{query.strip().lower()}|{history}"
+        return hashlib.blake2b(parts.encode()).hexdigest()
+
+    @staticmethod
+    async def setup_agent(db: AsyncSession, agent_id: int) -> BaseAgent:
+        """Setup agent with specified LLM config"""
+        # A cheap lookup tells whether the cached agent is still current
+        agent_version = (await db.execute(lambda_stmt(
+            lambda: select(Agent.config_id, Agent.updated_at).where(Agent.id == agent_id)
+        ))).first()
+        if not agent_version:
+            raise HTTPException(status_code=404, detail="Agent not found")
+        key = (agent_id, agent_version.config_id, agent_version.updated_at)
+        built_agent = agent_cache.get(key)
+        if built_agent is not None:
+            return built_agent
+
+        # Agent, LLM config and foundation come back in one SELECT, the knowledge bases in one more
+        agent = await db.scalar(
+            select(Agent)
+            .options(*AGENT_SETUP_LOAD_OPTIONS)
+            .where(Agent.id == agent_id)
+            .execution_options(populate_existing=True)
+        )
+        if not agent:
+            raise HTTPException(status_code=404, detail="Agent not found")
+        built_agent = ChatService.build_agent(agent)
+        agent_cache[key] = built_agent
+        return built_agent
+
     @staticmethod
-    async def setup_communication(db: Session, communication_id: int) -> BaseAgent:
+    async def setup_communication(db: AsyncSession, communication_id: int) -> BaseAgent:
         """Setup agent communication with specified multiple agents"""
-        # Get agent and config
-        communication = db.query(Communication).filter(Communication.id == communication_id).first()
+        # Cheap lookups tell whether the cached manager and its agents are still current
+        communication_version = (await db.execute(
+            select(Communication.updated_at).where(Communication.id == communication_id)
+        )).first()
+        if not communication_version:
+            raise HTTPException(status_code=404, detail="Communication not found")
+        member_versions = (await db.execute(
+            select(Agent.id, Agent.config_id, Agent.updated_at)
+            .join(CommunicationAgentMember, CommunicationAgentMember.agent_id == Agent.id)
+            .where(CommunicationAgentMember.communication_id == communication_id)
+            .order_by(Agent.id)
+        )).all()
+        manager_key = ("communication", communication_id, communication_version.updated_at, tuple(map(tuple, member_versions)))
+        manager_agent = agent_cache.get(manager_key)
+        if manager_agent is not None:
+            return manager_agent
+
+        # Get the communication with everything its agents need, instead of a setup_agent query per agent
+        communication = await db.scalar(
+            select(Communication)
+            .options(selectinload(Communication.agents).options(*AGENT_SETUP_LOAD_OPTIONS))
+            .where(Communication.id == communication_id)
+            .execution_options(populate_existing=True)
+        )
         if not communication:
             raise HTTPException(status_code=404, detail="Communication not found")
         agents : List[Agent] = communication.agents
         system_prompt="You are a intelligent matcher agent"
         manager_agent = ManagerAgent(
-            llm=UnifiedLLM(system_prompt=system_prompt),
+            llm=ChatService.get_llm(system_prompt=system_prompt),
             options=AgentOptions(
                 id="manager",
                 name="Manager",
@@ -94,18 +226,29 @@ class ChatService:
             system_prompt=system_prompt,
             validation_threshold=0.7
         )
-        for agent in agents:
-            manager_agent.register_agent(await ChatService.setup_agent(db, agent.id))
+        keys = [(agent.id, agent.config_id, agent.updated_at) for agent in agents]
+        built_agents = {key: agent_cache.get(key) for key in keys}
+        # Everything build_agent reads is loaded, the missing agents (and their
+        # LLM clients) are built concurrently instead of one after another
+        missing = [(key, agent) for key, agent in zip(keys, agents) if built_agents[key] is None]
+        new_agents = await asyncio.gather(
+            *(asyncio.to_thread(ChatService.build_agent, agent) for _, agent in missing)
+        )
+        for (key, _), built_agent in zip(missing, new_agents):
+            built_agents[key] = agent_cache[key] = built_agent
+        for key in keys:
+            manager_agent.register_agent(built_agents[key])
 
         # Create and return agent
+        agent_cache[manager_key] = manager_agent
         return manager_agent
     @staticmethod
-    async def create_conversation(db: Session, conv_create: ConversationCreate) -> Conversation:
+    async def create_conversation(db: AsyncSession, conv_create: ConversationCreate) -> Conversation:
         conversation = Conversation(
             title=conv_create.title
         )
         db.add(conversation)
-        db.flush()
+        await db.flush()
 
         agent_conv = AgentConversation(
             agent_id=conv_create.agent_id,
@@ -114,33 +257,34 @@ class ChatService:
         db.add(agent_conv)
 
         try:
-            db.commit()
-            db.refresh(conversation)
-            return conversation
+            await db.commit()
+            return await ChatService.get_conversation(db, conversation.id)
         except IntegrityError:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=400, detail="Invalid agent IDs")
     @staticmethod
     async def create_communication_conversation(
-        db: Session,
+        db: AsyncSession,
         conv_create: CommunicationConversationCreate
     ) -> Conversation:
-        # Verify communication exists and is active
-        communication = db.query(Communication).filter(
-            Communication.id == conv_create.communication_id,
-            Communication.is_active == True
-        ).first()
-        if not communication:
+        # Verify communication exists and is active (SELECT EXISTS, no row is loaded)
+        communication_exists = await db.scalar(
+            select(exists().where(
+                Communication.id == conv_create.communication_id,
+                Communication.is_active == True
+            ))
+        )
+        if not communication_exists:
             raise HTTPException(status_code=404, detail="Communication not found")
         
         # Create conversation
         conversation = Conversation(title=conv_create.title)
         db.add(conversation)
-        db.flush()
+        await db.flush()
 
         # Link conversation to communication
         comm_conv = CommunicationConversation(
-            communication_id=communication.id,
+            communication_id=conv_create.communication_id,
             conversation_id=conversation.id
         )
         db.add(comm_conv)
@@ -153,52 +297,145 @@ class ChatService:
         #     )
         #     db.add(agent_conv)
 
-        db.commit()
-        db.refresh(conversation)
-        return conversation
+        await db.commit()
+        return await ChatService.get_conversation(db, conversation.id)
     @staticmethod
-    async def get_conversation(db: Session, conversation_id: int) -> Optional[Conversation]:
-        conversation = db.query(Conversation)\
-            .filter(Conversation.id == conversation_id)\
-            .first()
+    async def get_conversation(db: AsyncSession, conversation_id: int) -> Optional[Conversation]:
+        conversation = await db.scalar(
+            select(Conversation)
+            .options(*CONVERSATION_LOAD_OPTIONS)
+            .where(Conversation.id == conversation_id)
+            .execution_options(populate_existing=True)
+        )
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
         return conversation
 
     @staticmethod
-    async def get_all_conversations(db: Session, skip: int = 0, limit: int = 100, agent_id: Optional[int] = None) -> List[Conversation]:
-        query = db.query(Conversation)
+    async def get_all_conversations(db: AsyncSession, skip: int = 0, limit: int = 100, agent_id: Optional[int] = None, after_id: Optional[int] = None) -> List[Conversation]:
+        query = select(Conversation).options(*CONVERSATION_LIST_LOAD_OPTIONS)
         if agent_id:
             query = query.join(AgentConversation)\
-                        .filter(AgentConversation.agent_id == agent_id)
-        return query.offset(skip).limit(limit).all()
+                        .where(AgentConversation.agent_id == agent_id)
+        result = await db.scalars(ChatService._paginate(query, skip, limit, after_id))
+        return result.all()
     @staticmethod
-    async def get_all_communication_conversations(db: Session, skip: int = 0, limit: int = 100, communication_id: Optional[int] = None) -> List[Conversation]:
-        query = db.query(Conversation)
+    async def get_all_communication_conversations(db: AsyncSession, skip: int = 0, limit: int = 100, communication_id: Optional[int] = None, after_id: Optional[int] = None) -> List[Conversation]:
+        query = select(Conversation).options(*CONVERSATION_LIST_LOAD_OPTIONS)
         if communication_id:
             query = query.join(CommunicationConversation)\
-                        .filter(CommunicationConversation.communication_id == communication_id)
-        return query.offset(skip).limit(limit).all()
+                        .where(CommunicationConversation.communication_id == communication_id)
+        result = await db.scalars(ChatService._paginate(query, skip, limit, after_id))
+        return result.all()
 
     @staticmethod
-    async def update_conversation(db: Session, conversation_id: int, conv_update: ConversationUpdate) -> Conversation:
+    def _paginate(query: Select, skip: int, limit: int, after_id: Optional[int]) -> Select:
+        """Page by id after `after_id` (keyset, no rows skipped), or by offset without it"""
+        query = query.order_by(Conversation.id).limit(limit)
+        if after_id is not None:
+            return query.where(Conversation.id > after_id)
+        return query.offset(skip)
+
+    @staticmethod
+    async def update_conversation(db: AsyncSession, conversation_id: int, conv_update: ConversationUpdate) -> Conversation:
         conversation = await ChatService.get_conversation(db, conversation_id)
-        update_data = conv_update.dict(exclude_unset=True)
+        update_data = conv_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(conversation, field, value)
-        db.commit()
-        db.refresh(conversation)
+        # Set on the client so the commit leaves nothing expired to re-SELECT
+        conversation.updated_at = datetime.utcnow()
+        await db.commit()
         return conversation
 
     @staticmethod
-    async def delete_conversation(db: Session, conversation_id: int) -> bool:
+    async def delete_conversation(db: AsyncSession, conversation_id: int) -> bool:
         conversation = await ChatService.get_conversation(db, conversation_id)
-        db.delete(conversation)
-        db.commit()
+        await db.delete(conversation)
+        await db.commit()
         return True
 
     @staticmethod
-    async def chat(db: Session, message: MessageCreate) -> Message:
+    async def add_messages(db: AsyncSession, messages: List[MessageCreate]) -> List[Message]:
+        """Store several messages as is, in a single transaction"""
+        db_messages = [
+            Message(conversation_id=message.conversation_id,
+                role=message.role,
+                content=message.content,
+                type=message.type)
+            for message in messages
+        ]
+        db.add_all(db_messages)
+        try:
+            await db.flush()
+            message_ids = [db_message.id for db_message in db_messages]
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="Invalid conversation IDs")
+        
+        # Load the server generated created_at of every message in one query
+        result = await db.scalars(
+            select(Message)
+            .where(Message.id.in_(message_ids))
+            .order_by(Message.id)
+            .execution_options(populate_existing=True)
+        )
+        return result.all()
+
+    @staticmethod
+    async def _setup_chat(db: AsyncSession, message: MessageCreate) -> Tuple[BaseAgent, List[ChatMessage], Tuple[str, int]]:
+        """Build the agent answering the conversation, its recent chat history and the agent's key"""
+        # The per-turn queries are lambda statements, built and cache-keyed once
+        # instead of on every message; conversation_id becomes a bound parameter
+        conversation_id = message.conversation_id
+        # Only the id of the agent (or communication) is needed, not the link row
+        if message.type == MessageType.AGENT:
+            agent_id = await db.scalar(lambda_stmt(
+                lambda: select(AgentConversation.agent_id)
+                .where(AgentConversation.conversation_id == conversation_id)
+            ))
+            if agent_id is None:
+                raise HTTPException(status_code=404, detail="Agent conversation not found")
+                
+            agent = await ChatService.setup_agent(db, agent_id)   
+            agent_key = ("agent", agent_id)
+        else:
+            communication_id = await db.scalar(lambda_stmt(
+                lambda: select(CommunicationConversation.communication_id)
+                .where(CommunicationConversation.conversation_id == conversation_id)
+            ))
+            if communication_id is None:
+                raise HTTPException(status_code=404, detail="Communication conversation not found")
+                
+            agent = await ChatService.setup_communication(db, communication_id)
+            agent_key = ("communication", communication_id)
+        
+        # Only the columns the history needs, as plain rows without ORM identity overhead
+        history = (await db.execute(lambda_stmt(
+            lambda: select(Message.role, Message.content)
+            .where(Message.conversation_id == conversation_id)
+            .order_by(Message.created_at.desc())
+            .limit(5)
+        ))).all()
+        
+        # The latest five come newest first, the LLM reads them oldest first
+        chat_history = [ChatMessage(role=CHAT_ROLES.get(role, MessageRole.ASSISTANT), content=content) for role, content in reversed(history)]
+        return agent, chat_history, agent_key
+
+    @staticmethod
+    def _add_agent_message(db: AsyncSession, conversation_id: int, response: str) -> Message:
+        """Add the agent's response as a new message"""
+        agent_message = Message(
+            conversation_id=conversation_id,
+            role="assistant",
+            content=response,
+            type=MessageType.AGENT
+        )
+        db.add(agent_message)
+        return agent_message
+
+    @staticmethod
+    async def chat(db: AsyncSession, message: MessageCreate) -> Message:
         """Add a message to the conversation, optionally using an agent to generate a response."""
         # If the message is from a user and an agent is specified, generate a response
         db_message = Message(conversation_id=message.conversation_id,
@@ -208,42 +445,76 @@ class ChatService:
         db.add(db_message)
         
         if message.role == "user":
-            if message.type == MessageType.AGENT:
-                agent_conversation = db.query(AgentConversation)\
-                    .filter(AgentConversation.conversation_id == message.conversation_id)\
-                    .first()
-                    
-                agent = await ChatService.setup_agent(db, agent_conversation.agent_id)   
-            else:
-                communication_conversation = db.query(CommunicationConversation)\
-                    .filter(CommunicationConversation.conversation_id == message.conversation_id)\
-                    .first()
-                    
-                agent = await ChatService.setup_communication(db, communication_conversation.communication_id)
-            
-            history=db.query(Message).filter(
-                Message.conversation_id == message.conversation_id
-                ).order_by(Message.created_at.desc()).limit(5)
-            
-            response = await agent.achat(
-                    query=message.content,
-                    verbose=True,
-                    chat_history=[ChatMessage(role= "user" if m.role == RoleType.USER else "assistant", content=m.content) for m in history]
-            )     
+            agent, chat_history, agent_key = await ChatService._setup_chat(db, message)
+            # Store the user message and end the transaction, the connection goes
+            # back to the pool instead of being held for the whole LLM call
+            await db.commit()
             
-            print(response)
+            answer_key = ChatService.make_answer_key(agent_key, message.content, chat_history)
+            cache_answer = chat_cache_config.enabled and ChatService.answers_are_cacheable(agent)
+            response = answer_cache.get(answer_key) if cache_answer else None
+            if response is None:
+                # The same question asked after the same history while it is still
+                # answered shares the LLM call, each request stores its own messages
+                response = await chat_flight.do(answer_key, lambda: agent.achat(
+                        query=message.content,
+                        verbose=True,
+                        chat_history=chat_history
+                ))
+                if cache_answer:
+                    answer_cache[answer_key] = response
             
-            # Add the agent's response as a new message
-            agent_message = Message(
-                conversation_id=message.conversation_id,
-                role="assistant",
-                content=response,
-                type=MessageType.AGENT
-            )
+            logger.debug("Agent response: %s", response)
             
-            db.add(agent_message)
-            db.commit()
-            db.refresh(agent_message)
+            # A short second transaction stores the answer
+            agent_message = ChatService._add_agent_message(db, message.conversation_id, response)
+            await db.commit()
+            await db.refresh(agent_message)
             
             return agent_message
-        raise HTTPException(status_code=500, detail="Message should be from user role")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Message should be from user role")
+
+    @staticmethod
+    async def stream_chat(db: AsyncSession, message: MessageCreate) -> AsyncGenerator[str, None]:
+        """
+        Same as `chat` but returns a Server-Sent Events stream of the agent response.
+
+        Each token is sent as a `data:` event as soon as the agent yields it. Both
+        messages are only stored once the stream completes, then the stored agent
+        message is sent as a final `done` event.
+        """
+        if message.role != "user":
+            raise HTTPException(status_code=500, detail="Message should be from user role")
+        
+        # Resolve the agent while the request session is still open
+        agent, chat_history, _ = await ChatService._setup_chat(db, message)
+        # End the read transaction so no pooled connection is held while tokens stream
+        await db.rollback()
+        
+        async def event_stream() -> AsyncGenerator[str, None]:
+            tokens = []
+            try:
+                async for token in agent.astream_chat(
+                    query=message.content,
+                    verbose=True,
+                    chat_history=chat_history
+                ):
+                    tokens.append(token)
+                    yield f"data: {json.dumps({'content': token})}\n\n"
+            except Exception as e:
+                yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+                return
+            
+            # The request session is already closed once the body is streamed
+            async with AsyncSessionLocal() as session:
+                session.add(Message(conversation_id=message.conversation_id,
+                    role=message.role,
+                    content=message.content,
+                    type=message.type))
+                agent_message = ChatService._add_agent_message(session, message.conversation_id, "".join(tokens))
+                await session.commit()
+                await session.refresh(agent_message)
+                payload = MessageResponse.model_validate(agent_message, from_attributes=True).model_dump_json()
+            yield f"event: done\ndata: {payload}\n\n"
+        
+        return event_stream()
@@ -1,21 +1,29 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from typing import List, Optional
 from datetime import datetime
 
 from src.db.models import (
-    Communication, CommunicationAgentMember, 
+    Communication, CommunicationAgentMember, CommunicationRole,
     CommunicationConversation, Agent, Conversation, AgentConversation
 )
+from src.db.loaders import LoadGenerator
 from api.schemas.communication import (
     CommunicationCreate, CommunicationUpdate,
-    CommunicationMemberCreate
+    CommunicationMemberCreate, CommunicationResponse
 )
 
+# Relationships serialized in CommunicationResponse, loaded up front since
+# AsyncSession cannot lazy load them during serialization
+COMMUNICATION_LOAD_OPTIONS = LoadGenerator.from_schema(Communication, CommunicationResponse)
+# Read-only listings also skip the columns CommunicationResponse does not serialize
+COMMUNICATION_LIST_LOAD_OPTIONS = LoadGenerator.from_schema(Communication, CommunicationResponse, only_columns=True)
+
 class CommunicationService:
     @staticmethod
-    async def create_communication(db: Session, comm_create: CommunicationCreate) -> Communication:
+    async def create_communication(db: AsyncSession, comm_create: CommunicationCreate) -> Communication:
         try:
             communication = Communication(
                 name=comm_create.name,
@@ -23,69 +31,89 @@ class CommunicationService:
                 configuration=comm_create.configuration or {}
             )
             db.add(communication)
-            db.flush()
+            await db.flush()
 
-            # Add agent members
-            for agent_id in comm_create.agent_ids:
-                member = CommunicationAgentMember(
-                    communication_id=communication.id,
-                    agent_id=agent_id,
-                    role="member"
+            # Add agent members, in a single executemany INSERT
+            if comm_create.agent_ids:
+                await db.execute(
+                    insert(CommunicationAgentMember),
+                    [
+                        {"communication_id": communication.id, "agent_id": agent_id, "role": CommunicationRole.MEMBER}
+                        for agent_id in dict.fromkeys(comm_create.agent_ids)
+                    ]
                 )
-                db.add(member)
 
-            db.commit()
-            db.refresh(communication)
-            return communication
+            await db.commit()
+            return await CommunicationService.get_communication(db, communication.id)
         except IntegrityError:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=400, detail="Invalid agent IDs")
 
     @staticmethod
-    async def get_communication(db: Session, communication_id: int) -> Optional[Communication]:
-        communication = db.query(Communication).filter(
-            Communication.id == communication_id,
-            Communication.is_active == True
-        ).first()
+    async def get_communication(db: AsyncSession, communication_id: int) -> Optional[Communication]:
+        communication = await db.scalar(
+            select(Communication)
+            .options(*COMMUNICATION_LOAD_OPTIONS)
+            .where(
+                Communication.id == communication_id,
+                Communication.is_active == True
+            )
+            .execution_options(populate_existing=True)
+        )
         if not communication:
             raise HTTPException(status_code=404, detail="Communication not found")
         return communication
 
     @staticmethod
     async def get_all_communications(
-        db: Session,
+        db: AsyncSession,
         skip: int = 0,
         limit: int = 100,
-        agent_id: Optional[int] = None
+        agent_id: Optional[int] = None,
+        after_id: Optional[int] = None
     ) -> List[Communication]:
-        query = db.query(Communication)
+        query = select(Communication).options(*COMMUNICATION_LIST_LOAD_OPTIONS).order_by(Communication.id).limit(limit)
         if agent_id:
             query = query.join(CommunicationAgentMember)\
-                        .filter(CommunicationAgentMember.agent_id == agent_id)
-        return query.offset(skip).limit(limit).all()
+                        .where(CommunicationAgentMember.agent_id == agent_id)
+        # Keyset pagination seeks straight to the page, OFFSET reads and drops `skip` rows
+        if after_id is not None:
+            query = query.where(Communication.id > after_id)
+        else:
+            query = query.offset(skip)
+        result = await db.scalars(query)
+        return result.all()
 
     @staticmethod
     async def update_communication(
-        db: Session,
+        db: AsyncSession,
         communication_id: int,
         comm_update: CommunicationUpdate
     ) -> Communication:
         communication = await CommunicationService.get_communication(db, communication_id)
-        update_data = comm_update.dict(exclude_unset=True)
+        update_data = comm_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(communication, field, value)
-        db.commit()
-        db.refresh(communication)
+        # Set on the client so the commit leaves nothing expired to re-SELECT
+        communication.updated_at = datetime.utcnow()
+        await db.commit()
         return communication
 
     @staticmethod
-    async def delete_communication(db: Session, communication_id: int) -> bool:
-        communication = await CommunicationService.get_communication(db, communication_id)
-        communication.is_active = False
-        db.commit()
+    async def delete_communication(db: AsyncSession, communication_id: int) -> bool:
+        # Soft delete is a one-row UPDATE, nothing needs to be loaded first
+        result = await db.execute(
+            update(Communication)
+            .where(Communication.id == communication_id, Communication.is_active == True)
+            .values(is_active=False, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Communication not found")
+        await db.commit()
         return True
 
     @staticmethod
-    async def get_communication_agents(db: Session, communication_id: int) -> List[Agent]:
+    async def get_communication_agents(db: AsyncSession, communication_id: int) -> List[Agent]:
         communication = await CommunicationService.get_communication(db, communication_id)
         return communication.agents
\ No newline at end of file
@@ -1,19 +1,24 @@
+import asyncio
 import json
 import os
 from pathlib import Path
 import tempfile
-from typing import List, Optional, Dict, Any
+from typing import BinaryIO, List, Optional, Dict, Any
 import uuid
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from fastapi import HTTPException
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from api.schemas.kb import (
     KnowledgeBaseCreate, 
     KnowledgeBaseResponse, 
     KnowledgeBaseUpdate,
     DocumentCreate,
-    DocumentResponse
+    DocumentResponse,
+    QueryRequest,
+    QueryResponse
 )
 from src.rag.base_rag import BaseRAG
 from src.db.models import (
@@ -23,26 +28,61 @@ from src.db.models import (
     DocumentStatus,
     DocumentChunk
 )
+from src.db.loaders import LoadGenerator
+from src.db.mysql import AsyncSessionLocal
 from src.db.qdrant import QdrantVectorDatabase
 from src.db.aws import S3Client, get_aws_s3_client
 from src.readers import parse_multiple_files, FileExtractor
 from src.rag.rag_manager import RAGManager
+from src.cache import QueryCache, SemanticCache, SingleFlight
+from api.services.chat import ChatService
 from src.config import Settings
 from src.logger import get_formatted_logger
 
 logger = get_formatted_logger(__file__)
 
+# KnowledgeBase.rag_config is part of KnowledgeBaseResponse and needed to build the RAG pipeline,
+# a many-to-one loaded in the same SELECT
+KNOWLEDGE_BASE_LOAD_OPTIONS = (joinedload(KnowledgeBase.rag_config),)
+# Document listings leave the stored original/processed contents unloaded
+DOCUMENT_LIST_LOAD_OPTIONS = LoadGenerator.from_schema(Document, DocumentResponse, only_columns=True)
+# Chunk metadata keys stored in their own DocumentChunk columns
+CHUNK_EMBEDDING_KEYS = ("dense_embedding", "sparse_embedding")
+
 class KnowledgeBaseService:
     def __init__(self, settings: Settings):
         self.settings = settings
         self.file_extractor = FileExtractor()
-        self.qdrant_client = QdrantVectorDatabase(url=settings.QDRANT_URL)
-        self.settings = settings
+        self.qdrant_client = QdrantVectorDatabase(
+            url=settings.QDRANT_URL,
+            quantization=settings.RAG_CONFIG.quantization,
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+        )
         self.s3_client = get_aws_s3_client()
+        self.query_cache = QueryCache(
+            maxsize=settings.QUERY_CACHE_CONFIG.maxsize,
+            ttl=settings.QUERY_CACHE_CONFIG.ttl,
+        )
+        self.semantic_cache: Optional[SemanticCache] = None
+        if settings.SEMANTIC_CACHE_CONFIG.enabled:
+            self.semantic_cache = SemanticCache(
+                threshold=settings.SEMANTIC_CACHE_CONFIG.threshold,
+                maxsize=settings.SEMANTIC_CACHE_CONFIG.maxsize,
+                ttl=settings.SEMANTIC_CACHE_CONFIG.ttl,
+            )
+        # Identical queries arriving while one is running share its result
+        self.query_flight = SingleFlight()
+        # Caps the background ingestions running at once, each one already
+        # spreads its parsing and embedding over worker threads
+        self.processing_semaphore = asyncio.Semaphore(settings.RAG_CONFIG.max_processing_documents)
         
+    async def close(self) -> None:
+        """Release the underlying client connections"""
+        await self.qdrant_client.aclose()
+
     async def create_knowledge_base(
         self, 
-        session: Session, 
+        session: AsyncSession, 
         kb_data: KnowledgeBaseCreate
     ) -> KnowledgeBaseResponse:
         """Create a new knowledge base with RAG configuration"""
@@ -59,7 +99,7 @@ class KnowledgeBaseService:
                 is_active=True
             )
             session.add(rag_config)
-            session.flush()  # Get the rag_config.id
+            await session.flush()  # Get the rag_config.id
             
             # Create the knowledge base
             kb = KnowledgeBase(
@@ -70,36 +110,33 @@ class KnowledgeBaseService:
                 is_active=True
             )
             session.add(kb)
-            session.flush()
+            await session.flush()
             
             specific_id = f"kb-{kb.id}-{uuid.uuid4()}"
             kb.specific_id = specific_id
             try:
-                self.qdrant_client.create_collection(specific_id, vector_size=768)
-                self.s3_client.create_bucket(specific_id)
-                session.commit()
-                session.refresh(kb)
-                return kb
+                await self.qdrant_client.acreate_collection(specific_id, vector_size=768)
+                await asyncio.to_thread(self.s3_client.create_bucket, specific_id)
+                await session.commit()
+                return await self.get_knowledge_base(session, kb.id)
             except Exception as e:
-                session.rollback()
+                await session.rollback()
                 raise HTTPException(500, f"Failed to create collection in Qdrant: {str(e)}")
         except HTTPException as e:
-            session.rollback()
+            await session.rollback()
             raise e
         except Exception as e:
-            session.rollback()
+            await session.rollback()
             raise e
 
     async def update_knowledge_base(
         self,
-        session: Session,
+        session: AsyncSession,
         kb_id: int,
         kb_data: KnowledgeBaseUpdate
     ) -> KnowledgeBaseResponse:
         """Update an existing knowledge base"""
-        kb = session.query(KnowledgeBase).filter(KnowledgeBase.id == kb_id).first()
-        if not kb:
-            raise HTTPException(status_code=404, detail="Knowledge base not found")
+        kb = await self.get_knowledge_base(session, kb_id)
 
         # Lấy RAG config nếu tồn tại
         rag_config = kb.rag_config
@@ -108,103 +145,175 @@ class KnowledgeBaseService:
 
         # Nếu có cập nhật RAG config, chỉ update các field có giá trị
         if kb_data.rag_config:
-            rag_update_data = kb_data.rag_config.dict(exclude_unset=True)
+            rag_update_data = kb_data.rag_config.model_dump(exclude_unset=True)
             for key, value in rag_update_data.items():
                 setattr(rag_config, key, value)
-            session.commit()
-            session.refresh(rag_config)
+            rag_config.updated_at = datetime.utcnow()
 
         # Cập nhật các field của Knowledge Base (ngoại trừ `rag_config`)
-        update_data = kb_data.dict(exclude={"rag_config"}, exclude_unset=True)
+        update_data = kb_data.model_dump(exclude={"rag_config"}, exclude_unset=True)
         for key, value in update_data.items():
             setattr(kb, key, value)
 
+        # Both rows are written in one commit, updated_at is set on the client
+        # so nothing is left expired to re-SELECT
         kb.updated_at = datetime.utcnow()
-        session.commit()
-        session.refresh(kb)
+        await session.commit()
+        # Agents built on this knowledge base carry its RAG config in their tools
+        ChatService.invalidate_agents()
         return kb
 
     async def list_knowledge_bases(
         self,
-        session: Session,
+        session: AsyncSession,
         skip: int = 0,
         limit: int = 10
     ) -> List[KnowledgeBaseResponse]:
         """List all knowledge bases"""
-        return session.query(KnowledgeBase)\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+        result = await session.scalars(
+            select(KnowledgeBase)
+            .options(*KNOWLEDGE_BASE_LOAD_OPTIONS)
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.all()
 
     async def get_knowledge_base(
         self,
-        session: Session,
+        session: AsyncSession,
         kb_id: int
     ) -> KnowledgeBaseResponse:
         """Get a specific knowledge base"""
-        kb = session.query(KnowledgeBase).filter(KnowledgeBase.id == kb_id).first()
+        kb = await session.scalar(
+            select(KnowledgeBase)
+            .options(*KNOWLEDGE_BASE_LOAD_OPTIONS)
+            .where(KnowledgeBase.id == kb_id)
+            .execution_options(populate_existing=True)
+        )
         if not kb:
             raise HTTPException(status_code=404, detail="Knowledge base not found")
         return kb
 
     async def get_documents_by_kb( self,
-        session: Session,
+        session: AsyncSession,
         kb_id: int)-> List[DocumentResponse]:
-        return session.query(Document).filter(Document.knowledge_base_id == kb_id).all()
+        result = await session.scalars(
+            select(Document)
+            .options(*DOCUMENT_LIST_LOAD_OPTIONS)
+            .where(Document.knowledge_base_id == kb_id)
+        )
+        return result.all()
 
     async def get_rag_from_kb(
         self,
-        session: Session,
+        session: AsyncSession,
         kb_id: int
      ) -> BaseRAG:
-        kb = session.query(KnowledgeBase).filter(KnowledgeBase.id == kb_id).first()
-        if not kb:
-            raise HTTPException(status_code=404, detail="Knowledge base not found")
-        # Get RAG config
+        kb = await self.get_knowledge_base(session, kb_id)
+        return await self.get_rag_for_kb(kb)
+
+    async def get_rag_for_kb(self, kb: KnowledgeBase) -> BaseRAG:
+        """Get the RAG pipeline of a knowledge base loaded with its rag_config"""
         rag_config :RAGConfig = kb.rag_config
         if not rag_config:
             raise HTTPException(status_code=404, detail="RAG Config not found")
-        # Initialize RAG manager
-        rag_manager = RAGManager.create_rag(
+        # Building the RAG pipeline connects to Qdrant and loads the embedding models,
+        # it is only done the first time these settings are used
+        rag_manager = await asyncio.to_thread(
+            RAGManager.get_rag,
             rag_type=rag_config.rag_type,
             qdrant_url=self.settings.QDRANT_URL,
             gemini_api_key=self.settings.GEMINI_CONFIG.api_key,
             chunk_size=rag_config.chunk_size,
             chunk_overlap=rag_config.chunk_overlap,
+            batch_size=self.settings.RAG_CONFIG.batch_size,
+            max_concurrency=self.settings.RAG_CONFIG.max_concurrency,
+            quantization=self.settings.RAG_CONFIG.quantization,
         )
         return rag_manager
+    async def query_documents(
+        self,
+        session: AsyncSession,
+        kb_id: int,
+        query_request: QueryRequest
+    ) -> QueryResponse:
+        """Answer a query from the documents of a knowledge base"""
+        kb = await self.get_knowledge_base(session, kb_id)
+        # The endpoint is scoped to this knowledge base, its collection is the only one searched
+        if query_request.collection_name not in (None, kb.specific_id):
+            raise HTTPException(400, "collection_name must be the knowledge base collection")
+        collection_name = kb.specific_id
+
+        cache_key = QueryCache.make_key(query_request.query, collection_name, query_request.limit)
+        cached_response = await self.query_cache.get(cache_key)
+        if cached_response is not None:
+            return QueryResponse(query=query_request.query, response=cached_response)
+
+        return await self.query_flight.do(
+            cache_key,
+            lambda: self._query_documents(kb, query_request, collection_name, cache_key),
+        )
+
+    async def _query_documents(
+        self,
+        kb: KnowledgeBase,
+        query_request: QueryRequest,
+        collection_name: str,
+        cache_key: str
+    ) -> QueryResponse:
+        """Run the query through the semantic cache and the RAG pipeline"""
+        rag_manager = await self.get_rag_for_kb(kb)
+        try:
+            query_embedding = None
+            if self.semantic_cache is not None:
+                # The embedding cache makes the search reuse this embedding
+                query_embedding = await asyncio.to_thread(
+                    rag_manager.dense_embedding_model.get_text_embedding, query_request.query
+                )
+                namespace = SemanticCache.make_namespace(collection_name, query_request.limit)
+                cached_response = await self.semantic_cache.get(namespace, query_embedding)
+                if cached_response is not None:
+                    await self.query_cache.set(cache_key, cached_response)
+                    return QueryResponse(query=query_request.query, response=cached_response)
+
+            response = await asyncio.to_thread(
+                rag_manager.search,
+                query=query_request.query,
+                collection_name=collection_name,
+                limit=query_request.limit,
+            )
+        except Exception as e:
+            logger.error(f"Error querying knowledge base: {str(e)}")
+            raise HTTPException(500, f"Failed to query knowledge base: {str(e)}")
+
+        await self.query_cache.set(cache_key, response)
+        if query_embedding is not None:
+            await self.semantic_cache.set(namespace, query_embedding, response)
+        return QueryResponse(query=query_request.query, response=response)
+
+    async def _invalidate_query_caches(self, collection_name: str) -> None:
+        """Drop the cached query results of a collection whose documents changed"""
+        await self.query_cache.invalidate(collection_name)
+        if self.semantic_cache is not None:
+            await self.semantic_cache.invalidate(collection_name)
+        # Agent answers may quote the changed documents
+        ChatService.invalidate_answers()
+
     async def create_document(
         self,
-        session: Session,
+        session: AsyncSession,
         kb_id: int,
         doc_data: DocumentCreate,
-        file_content: bytes,
+        file: BinaryIO,
         filename: str
     ) -> DocumentResponse:
         """Create a new document and store it in S3"""
-        kb = session.query(KnowledgeBase).filter(KnowledgeBase.id == kb_id).first()
+        kb = await session.get(KnowledgeBase, kb_id)
         if not kb:
             raise HTTPException(status_code=404, detail="Knowledge base not found")
         
-        temp_file = None
         try:
-            # Create temp directory if it doesn't exist
-            temp_dir = Path(tempfile.gettempdir()) / "uploads"
-            temp_dir.mkdir(parents=True, exist_ok=True)
-            
-            original_filename = Path(filename)
-            extension = original_filename.suffix.lower()
-            
-            # Create temp file with unique name
-            temp_file = tempfile.NamedTemporaryFile(
-                delete=False,
-                suffix=extension,
-                dir=temp_dir
-            )
-            
-            # Write content to temp file
-            with open(temp_file.name, 'wb') as f:
-                f.write(file_content)
+            extension = Path(filename).suffix.lower()
             
             # Generate S3 path
             date_path = datetime.now().strftime("%Y/%m/%d")
@@ -213,10 +322,11 @@ class KnowledgeBaseService:
 
             # Upload to S3
             try:
-                file_path_in_s3 = self.s3_client.upload_file(
+                file_path_in_s3 = await asyncio.to_thread(
+                    self.s3_client.upload_fileobj,
                     bucket_name=bucket_name,
                     object_name=os.path.join(date_path, file_name),
-                    file_path=str(temp_file.name),
+                    file_obj=file,
                 )
             except Exception as e:
                 logger.error(f"S3 upload failed: {str(e)}")
@@ -233,214 +343,263 @@ class KnowledgeBaseService:
             )
             
             session.add(document)
-            session.commit()
-            session.refresh(document)
+            await session.commit()
+            await session.refresh(document)
             
             return document
             
         except Exception as e:
-            session.rollback()
+            await session.rollback()
             logger.error(f"Error creating document: {str(e)}")
             raise HTTPException(500, f"Failed to create document: {str(e)}")
-            
-        finally:
-            # Cleanup temp file
-            if temp_file and os.path.exists(temp_file.name):
-                try:
-                    os.unlink(temp_file.name)
-                except Exception as e:
-                    logger.warning(f"Failed to delete temp file: {str(e)}")
+
+    async def start_document_processing(
+        self,
+        session: AsyncSession,
+        kb_id: int,
+        doc_id: int,
+    ) -> DocumentResponse:
+        """Mark a document as processing before it is handed to a background task"""
+        doc = await session.scalar(
+            select(Document).where(
+                Document.id == doc_id,
+                Document.knowledge_base_id == kb_id
+            )
+        )
+        if not doc:
+            raise HTTPException(status_code=404, detail="Document not found")
+        if doc.status == DocumentStatus.PROCESSING:
+            # Background tasks run in the worker, one that restarted mid-ingestion
+            # leaves the status behind: such a document is re-queued once stale
+            last_update = doc.updated_at or doc.created_at
+            stale_before = datetime.utcnow() - timedelta(seconds=self.settings.RAG_CONFIG.processing_timeout)
+            if last_update is None or last_update.replace(tzinfo=None) > stale_before:
+                raise HTTPException(status_code=409, detail="Document is already being processed")
+            logger.warning(f"Re-queuing document {doc_id}, processing since {last_update}")
+
+        doc.status = DocumentStatus.PROCESSING
+        doc.updated_at = datetime.utcnow()
+        await session.commit()
+        return doc
+
+    async def process_document_in_background(self, kb_id: int, doc_id: int) -> None:
+        """Process a document outside of the request, in a session of its own"""
+        # Waiting tasks do not hold a database connection
+        async with self.processing_semaphore, AsyncSessionLocal() as session:
+            try:
+                await self.process_document(kb_id, doc_id, session)
+            except Exception as e:
+                # process_document already marked the document as failed
+                logger.error(f"Background processing of document {doc_id} failed: {str(e)}")
 
     async def process_document(
         self,
         kb_id: int,
         doc_id: int,
-        session: Session,
+        session: AsyncSession,
     ) -> DocumentResponse:
         """Process document content and create embeddings"""
-        # Get knowledge base and document
-        kb = session.query(KnowledgeBase).filter(KnowledgeBase.id == kb_id).first()
-        if not kb:
-            raise HTTPException(status_code=404, detail="Knowledge base not found")
-            
-        doc = session.query(Document).filter(
-            Document.id == doc_id,
-            Document.knowledge_base_id == kb_id
-        ).first()
+        # Get the document with its knowledge base and RAG config in one SELECT
+        doc = await session.scalar(
+            select(Document)
+            .options(joinedload(Document.knowledge_base).joinedload(KnowledgeBase.rag_config))
+            .where(
+                Document.id == doc_id,
+                Document.knowledge_base_id == kb_id
+            )
+        )
         if not doc:
             raise HTTPException(status_code=404, detail="Document not found")
-            
-        rag_manager = await self.get_rag_from_kb(session, kb_id)
+        kb = doc.knowledge_base
         
-        # Update document status
-        doc.status = DocumentStatus.PENDING
-        session.commit()
+        # Update status to processing
+        doc.status = DocumentStatus.PROCESSING
+        doc.updated_at = datetime.utcnow()
+        await session.commit()
         
-        temp_file = None
         try:
-            # Create temp directory
-            temp_dir = Path(tempfile.gettempdir()) / "downloads"
-            temp_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Create temp file
-            temp_file = tempfile.NamedTemporaryFile(
-                delete=False,
-                suffix=doc.extension,
-                dir=temp_dir
-            )
-            
-            # Update status to processing
-            doc.status = DocumentStatus.PROCESSING
-            session.commit()
-            
-            # Download file from S3
-            try:
-                self.s3_client.download_file(
-                    file_url=doc.source,
-                    file_path_to_save=temp_file.name
-                )
-            except Exception as e:
-                logger.error(f"S3 download failed: {str(e)}")
-                raise HTTPException(500, "Failed to download file from storage")
-            
-            
-            # Extract and process text
-            extractor = self.file_extractor.get_extractor_for_file(temp_file.name)
+            # Inside the try, a pipeline that cannot be built (Qdrant or Gemini
+            # unreachable) marks the document as failed like any other error
+            rag_manager = await self.get_rag_for_kb(kb)
+
+            # The extractor follows the stored extension, unsupported files fail
+            # before anything is downloaded
+            extractor = self.file_extractor.get_extractor_for_file(doc.extension)
             if not extractor:
                 raise HTTPException(400, f"No extractor found for file type: {doc.extension}")
-                
-            documents = parse_multiple_files(temp_file.name, extractor)
+
+            # The file is written once by the S3 download and read once by the parser;
+            # the directory (and file) is removed as soon as parsing is done
+            with tempfile.TemporaryDirectory(prefix="downloads-") as temp_dir:
+                file_path = os.path.join(temp_dir, f"{doc.id}{doc.extension}")
+
+                # Download file from S3
+                try:
+                    await asyncio.to_thread(
+                        self.s3_client.download_file,
+                        file_url=doc.source,
+                        file_path_to_save=file_path
+                    )
+                except Exception as e:
+                    logger.error(f"S3 download failed: {str(e)}")
+                    raise HTTPException(500, "Failed to download file from storage")
+
+                # Parsing (PDF/DOCX extraction) is CPU-bound, keep it off the event loop
+                documents = await asyncio.to_thread(parse_multiple_files, file_path, extractor)
             
-            # Process documents and create chunks
+            # Process all parsed documents together so chunks are embedded in batches
             for document in documents:
-                chunks = rag_manager.process_document(
-                    document=document.text,
-                    document_id=doc.id,
-                    collection_name=kb.specific_id,
-                    metadata={
-                        **document.metadata,
-                        "document_name": doc.name,
-                        "created_at": doc.created_at.isoformat(),
-                    }
+                document.metadata = {
+                    **document.metadata,
+                    "document_name": doc.name,
+                    "created_at": doc.created_at.isoformat(),
+                }
+            chunks = await rag_manager.aprocess_documents(
+                documents=documents,
+                document_id=doc.id,
+                collection_name=kb.specific_id,
+            )
+
+            # Create chunks in database, with one executemany INSERT instead of
+            # one unit-of-work object per chunk
+            if chunks:
+                await session.execute(
+                    insert(DocumentChunk),
+                    [
+                        {
+                            "document_id": doc.id,
+                            "content": chunk_data.text,
+                            "chunk_index": chunk_idx,
+                            "dense_embedding": chunk_data.metadata["dense_embedding"],
+                            "sparse_embedding": chunk_data.metadata["sparse_embedding"],
+                            # The embeddings have their own columns, keep them out of extra_info
+                            "extra_info": {
+                                key: value for key, value in chunk_data.metadata.items()
+                                if key not in CHUNK_EMBEDDING_KEYS
+                            },
+                        }
+                        for chunk_idx, chunk_data in enumerate(chunks)
+                    ]
                 )
-                
-                # Create chunks in database
-                for chunk_idx, chunk_data in enumerate(chunks):
-                    chunk = DocumentChunk(
-                        document_id=doc.id,
-                        content=chunk_data.text,
-                        chunk_index=chunk_idx,
-                        dense_embedding=chunk_data.metadata["dense_embedding"],
-                        sparse_embedding=chunk_data.metadata["sparse_embedding"],
-                        extra_info=chunk_data.metadata,
-                    )
-                    session.add(chunk)
             
             # Update document status
             doc.status = DocumentStatus.PROCESSED
-            session.commit()
-            session.refresh(doc)
+            doc.updated_at = datetime.utcnow()
+            await session.commit()
+            await self._invalidate_query_caches(kb.specific_id)
             
             return doc
             
         except Exception as e:
-            # Update document status to failed
+            # Update document status to failed, after discarding whatever the
+            # failed step left pending in the session
+            await session.rollback()
             doc.status = DocumentStatus.FAILED
-            session.commit()
+            doc.updated_at = datetime.utcnow()
+            await session.commit()
             
             logger.error(f"Error processing document: {str(e)}")
             raise HTTPException(500, f"Failed to process document: {str(e)}")
-            
-        finally:
-            # Cleanup temp file
-            if temp_file and os.path.exists(temp_file.name):
-                try:
-                    os.unlink(temp_file.name)
-                except Exception as e:
-                    logger.warning(f"Failed to delete temp file: {str(e)}")
-    async def _delete_document_file_from_s3(self, document: Document) -> None:
-        """Helper method to delete a document file from S3"""
+
+    async def _delete_document_files_from_s3(self, documents: List[Document]) -> None:
+        """Helper method to delete document files from S3"""
+        sources = [document.source for document in documents if document.source]
+        if not sources:
+            return
         try:
-            if document.source:
-                self.s3_client.remove_file(
-                    object_name=document.source
-                )
-                logger.info(f"Deleted document file from S3: {document.source}")
+            await asyncio.to_thread(self.s3_client.remove_files, sources)
+            logger.info(f"Deleted document files from S3: {sources}")
         except Exception as e:
-            logger.error(f"Error deleting document file from S3: {str(e)}")
+            logger.error(f"Error deleting document files from S3: {str(e)}")
             # Continue with deletion process even if S3 deletion fails
     
-    async def _delete_document_from_vector_store(self,collection_name: str, document_id: int) -> None:
+    async def _delete_documents_from_vector_store(self,collection_name: str, document_ids: List[int]) -> None:
         """Helper method to delete document vectors from Qdrant"""
         try:
-            # Delete vectors by filter
-            self.qdrant_client.delete_vector(
+            # Delete vectors of all documents with one filter
+            await self.qdrant_client.adelete_vectors(
                 collection_name=collection_name,
-                document_id=str(document_id)
+                document_ids=document_ids
             )
-            logger.info(f"Deleted document vectors from Qdrant: collection={collection_name}, document_id={document_id}")
+            logger.info(f"Deleted document vectors from Qdrant: collection={collection_name}, document_ids={document_ids}")
         except Exception as e:
-            logger.error(f"Error deleting document from vector store: {str(e)}")
+            logger.error(f"Error deleting documents from vector store: {str(e)}")
             # Continue with deletion process even if vector deletion fails    
     async def delete_document(
         self,
-        session: Session,
+        session: AsyncSession,
         kb_id: int,
         document_id: int
     ) -> Dict[str, str]:
         """Delete a document and its chunks from DB, S3, and vector store"""
-        # Find the document
-        document = session.query(Document)\
-            .filter(Document.id == document_id, Document.knowledge_base_id == kb_id)\
-            .first()
-            
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
+        await self.delete_documents(session, kb_id, [document_id])
+        return {"status": "success", "message": "Document deleted successfully"}
+
+    async def delete_documents(
+        self,
+        session: AsyncSession,
+        kb_id: int,
+        document_ids: List[int]
+    ) -> Dict[str, str]:
+        """Delete several documents and their chunks from DB, S3, and vector store"""
+        document_ids = list(dict.fromkeys(document_ids))
+        # Find the documents
+        result = await session.scalars(
+            select(Document)
+            .where(Document.id.in_(document_ids), Document.knowledge_base_id == kb_id)
+        )
+        documents = result.all()
+
+        missing_ids = set(document_ids) - {document.id for document in documents}
+        if missing_ids:
+            raise HTTPException(status_code=404, detail=f"Documents not found: {sorted(missing_ids)}")
         
         # Get the knowledge base to access specific_id for collection name
-        kb = session.query(KnowledgeBase).filter(KnowledgeBase.id == kb_id).first()
+        kb = await session.get(KnowledgeBase, kb_id)
         if not kb:
             raise HTTPException(status_code=404, detail="Knowledge base not found")
         
         try:
             # Step 1: Delete from S3
-            await self._delete_document_file_from_s3(document)
+            await self._delete_document_files_from_s3(documents)
             
             # Step 2: Delete from vector store
-            await self._delete_document_from_vector_store(kb.specific_id, document_id)
+            await self._delete_documents_from_vector_store(kb.specific_id, document_ids)
             
             # Step 3: Delete from database (this cascades to document chunks)
-            session.delete(document)
-            session.commit()
+            for document in documents:
+                await session.delete(document)
+            await session.commit()
+            await self._invalidate_query_caches(kb.specific_id)
             
-            return {"status": "success", "message": "Document deleted successfully"}
+            return {"status": "success", "message": f"{len(documents)} documents deleted successfully"}
             
         except Exception as e:
-            session.rollback()
-            logger.error(f"Error deleting document: {str(e)}")
-            raise HTTPException(500, f"Failed to delete document: {str(e)}")
+            await session.rollback()
+            logger.error(f"Error deleting documents: {str(e)}")
+            raise HTTPException(500, f"Failed to delete documents: {str(e)}")
     async def delete_knowledge_base(
         self,
-        session: Session,
+        session: AsyncSession,
         kb_id: int
     ) -> Dict[str, str]:
         """Delete a knowledge base and all its associated resources"""
         # Find the knowledge base
-        kb = session.query(KnowledgeBase).filter(KnowledgeBase.id == kb_id).first()
+        kb = await session.get(KnowledgeBase, kb_id)
         if not kb:
             raise HTTPException(status_code=404, detail="Knowledge base not found")
         
         try:   
             # Step 1: Delete the Qdrant collection for this KB
             try:
-                self.qdrant_client.delete_collection(kb.specific_id)
+                await self.qdrant_client.adelete_collection(kb.specific_id)
                 logger.info(f"Deleted Qdrant collection: {kb.specific_id}")
             except Exception as e:
                 logger.error(f"Error deleting Qdrant collection: {str(e)}")
                            
             # Step 2: Delete the S3 bucket for this KB
             try:
-                self.s3_client.remove_bucket(kb.specific_id)
+                await asyncio.to_thread(self.s3_client.remove_bucket, kb.specific_id)
                 logger.info(f"Deleted S3 bucket: {kb.specific_id}")
             except Exception as e:
                 logger.error(f"Error deleting S3 bucket: {str(e)}")
@@ -450,16 +609,18 @@ class KnowledgeBaseService:
             rag_config_id = kb.rag_config_id  # Store before deleting KB
             
             # Delete the KB first (this should cascade to documents and chunks)
-            session.delete(kb)
-            session.flush()
+            await session.delete(kb)
+            await session.flush()
             
             # Delete the RAG config if it exists
             if rag_config_id:
-                rag_config = session.query(RAGConfig).filter(RAGConfig.id == rag_config_id).first()
+                rag_config = await session.get(RAGConfig, rag_config_id)
                 if rag_config:
-                    session.delete(rag_config)
+                    await session.delete(rag_config)
             
-            session.commit()
+            await session.commit()
+            await self._invalidate_query_caches(kb.specific_id)
+            ChatService.invalidate_agents()
             
             return {
                 "status": "success", 
@@ -467,6 +628,6 @@ class KnowledgeBaseService:
             }
             
         except Exception as e:
-            session.rollback()
+            await session.rollback()
             logger.error(f"Error deleting knowledge base: {str(e)}")
             raise HTTPException(500, f"Failed to delete knowledge base: {str(e)}")
\ No newline at end of file
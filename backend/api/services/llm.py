@@ -1,7 +1,9 @@
 # src/services/llm_service.py
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.models import LLMFoundation, LLMConfig
+from api.services.chat import ChatService
 from api.schemas.llm import (
     LLMFoundationCreate, 
     LLMFoundationUpdate,
@@ -10,10 +12,11 @@ from api.schemas.llm import (
 )
 from fastapi import HTTPException
 from typing import List, Optional
+from datetime import datetime
 
 class LLMService:
     @staticmethod
-    async def create_foundation(db: Session, foundation: LLMFoundationCreate) -> LLMFoundation:
+    async def create_foundation(db: AsyncSession, foundation: LLMFoundationCreate) -> LLMFoundation:
         try:
             db_foundation = LLMFoundation(
                 provider=foundation.provider,
@@ -23,110 +26,123 @@ class LLMService:
                 capabilities=foundation.capabilities
             )
             db.add(db_foundation)
-            db.commit()
-            db.refresh(db_foundation)
+            await db.commit()
+            ChatService.invalidate_agents()
+            await db.refresh(db_foundation)
             return db_foundation
         except IntegrityError:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=400, detail="Model ID already exists")
 
     @staticmethod
-    async def get_foundation(db: Session, foundation_id: int) -> Optional[LLMFoundation]:
-        foundation = db.query(LLMFoundation).filter(LLMFoundation.id == foundation_id).first()
+    async def get_foundation(db: AsyncSession, foundation_id: int) -> Optional[LLMFoundation]:
+        foundation = await db.get(LLMFoundation, foundation_id)
         if not foundation:
             raise HTTPException(status_code=404, detail="LLM Foundation not found")
         return foundation
 
     @staticmethod
     async def get_all_foundations(
-        db: Session, 
+        db: AsyncSession, 
         skip: int = 0, 
         limit: int = 100,
         provider: Optional[str] = None
     ) -> List[LLMFoundation]:
-        query = db.query(LLMFoundation)
+        query = select(LLMFoundation)
         if provider:
-            query = query.filter(LLMFoundation.provider == provider)
-        return query.offset(skip).limit(limit).all()
+            query = query.where(LLMFoundation.provider == provider)
+        result = await db.scalars(query.offset(skip).limit(limit))
+        return result.all()
 
     @staticmethod
     async def update_foundation(
-        db: Session,
+        db: AsyncSession,
         foundation_id: int,
         foundation_update: LLMFoundationUpdate
     ) -> LLMFoundation:
         db_foundation = await LLMService.get_foundation(db, foundation_id)
         
-        update_data = foundation_update.dict(exclude_unset=True)
+        update_data = foundation_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_foundation, field, value)
+        # Set on the client so the commit leaves nothing expired to re-SELECT
+        db_foundation.updated_at = datetime.utcnow()
         
         try:
-            db.commit()
-            db.refresh(db_foundation)
+            await db.commit()
+            ChatService.invalidate_agents()
             return db_foundation
         except IntegrityError:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=400, detail="Update failed due to constraint violation")
 
     @staticmethod
-    async def delete_foundation(db: Session, foundation_id: int) -> bool:
+    async def delete_foundation(db: AsyncSession, foundation_id: int) -> bool:
         db_foundation = await LLMService.get_foundation(db, foundation_id)
-        db.delete(db_foundation)
-        db.commit()
+        await db.delete(db_foundation)
+        await db.commit()
+        ChatService.invalidate_agents()
         return True
 
     # LLM Config methods
     @staticmethod
-    async def create_config(db: Session, config: LLMConfigCreate) -> LLMConfig:
-        # Verify foundation exists
-        await LLMService.get_foundation(db, config.foundation_id)
+    async def create_config(db: AsyncSession, config: LLMConfigCreate) -> LLMConfig:
+        # Verify foundation exists (SELECT EXISTS, no row is loaded)
+        foundation_exists = await db.scalar(
+            select(exists().where(LLMFoundation.id == config.foundation_id))
+        )
+        if not foundation_exists:
+            raise HTTPException(status_code=404, detail="LLM Foundation not found")
         
-        db_config = LLMConfig(**config.dict())
+        db_config = LLMConfig(**config.model_dump())
         db.add(db_config)
-        db.commit()
-        db.refresh(db_config)
+        await db.commit()
+        await db.refresh(db_config)
         return db_config
 
     @staticmethod
-    async def get_config(db: Session, config_id: int) -> Optional[LLMConfig]:
-        config = db.query(LLMConfig).filter(LLMConfig.id == config_id).first()
+    async def get_config(db: AsyncSession, config_id: int) -> Optional[LLMConfig]:
+        config = await db.get(LLMConfig, config_id)
         if not config:
             raise HTTPException(status_code=404, detail="LLM Config not found")
         return config
 
     @staticmethod
     async def get_configs_by_foundation(
-        db: Session,
+        db: AsyncSession,
         foundation_id: int,
         skip: int = 0,
         limit: int = 100
     ) -> List[LLMConfig]:
-        return db.query(LLMConfig)\
-            .filter(LLMConfig.foundation_id == foundation_id)\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+        result = await db.scalars(
+            select(LLMConfig)
+            .where(LLMConfig.foundation_id == foundation_id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.all()
 
     @staticmethod
     async def update_config(
-        db: Session,
+        db: AsyncSession,
         config_id: int,
         config_update: LLMConfigUpdate
     ) -> LLMConfig:
         db_config = await LLMService.get_config(db, config_id)
         
-        update_data = config_update.dict(exclude_unset=True)
+        update_data = config_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_config, field, value)
+        db_config.updated_at = datetime.utcnow()
         
-        db.commit()
-        db.refresh(db_config)
+        await db.commit()
+        ChatService.invalidate_agents()
         return db_config
 
     @staticmethod
-    async def delete_config(db: Session, config_id: int) -> bool:
+    async def delete_config(db: AsyncSession, config_id: int) -> bool:
         db_config = await LLMService.get_config(db, config_id)
-        db.delete(db_config)
-        db.commit()
+        await db.delete(db_config)
+        await db.commit()
+        ChatService.invalidate_agents()
         return True
\ No newline at end of file
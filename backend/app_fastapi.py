@@ -1,16 +1,44 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.types import Receive, Scope, Send
 import uvicorn
 from api.routers.agent import agent_router  # Import the router we just created
 from api.routers.kb import kb_router
 from api.routers.llm import llm_router
 from api.routers.chat import chat_router
 from api.routers.communication import communication_router
+from api.services.kb import KnowledgeBaseService
+from src.config import get_settings
+from src.db.mysql import async_engine, create_tables
+
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """GZip that leaves Server-Sent Events alone, the compressor would hold tokens back"""
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].endswith("/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await create_tables()
+    # Build heavyweight clients once per worker instead of per request/import
+    app.state.kb_service = await asyncio.to_thread(KnowledgeBaseService, get_settings())
+    yield
+    await app.state.kb_service.close()
+    await async_engine.dispose()
+
 # Create FastAPI app
 app = FastAPI(
     title="Multi-Agent Chat API",
     description="API for interacting with multi-agent chat system",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware to allow Streamlit to communicate with the API
@@ -22,6 +50,9 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Compress larger responses (RAG answers, conversation histories) for clients sending Accept-Encoding: gzip
+app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=1024)
+
 # Include the agent router
 app.include_router(agent_router)
 app.include_router(kb_router)
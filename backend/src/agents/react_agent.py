@@ -78,8 +78,8 @@ class ReActAgent(BaseAgent):
                 logger.error(f"Error generating initial plan: {str(e)}")
             raise e
 
-    async def _generate_summary(self, task: str, results: List[Any], verbose:bool) -> str:
-        """Generate a coherent summary of the results"""
+    def _build_summary_prompt(self, task: str, results: List[Any]) -> str:
+        """Prompt asking the LLM to summarize the collected results"""
         prompt = f"""
         Create a clear and concise summary based on the following:
         
@@ -92,11 +92,14 @@ class ReActAgent(BaseAgent):
         3. Focus on providing a direct, informative answer
         4. If the information seems insufficient, acknowledge that
         """
-        
+        return self.system_prompt + "\n" + prompt
+
+    async def _generate_summary(self, task: str, results: List[Any], verbose:bool) -> str:
+        """Generate a coherent summary of the results"""
         if verbose:
             logger.info("Generating summary...")
         
-        summary_prompt = self.system_prompt + "\n" + prompt
+        summary_prompt = self._build_summary_prompt(task, results)
         
         try:
             result = await self.llm.achat(query=summary_prompt)
@@ -108,6 +111,54 @@ class ReActAgent(BaseAgent):
                 logger.error(f"Error generating summary: {str(e)}")
             raise e
 
+    async def _execute_plan(self, query: str, max_steps: int, verbose: bool) -> List[Any]:
+        """Generate a plan for the query and collect the results of its steps"""
+        # Generate plan
+        plan = await self._get_initial_plan(query,verbose)
+        
+        if verbose:
+            logger.info("\nExecuting plan...")
+        
+        # Execute all steps and collect results
+        results = []
+        for step_num, step in enumerate(plan.steps, 1):
+            if step_num > max_steps:
+                break
+                
+            if verbose:
+                logger.info(f"\nStep {step_num}/{len(plan.steps)}: {step.description}")
+            
+            try:
+                if step.requires_tool:
+                    result = await self._execute_tool(step.tool_name, step.description,step.requires_tool)
+                    if verbose:
+                        logger.info(f"Tool {step.tool_name} executed successfully with arguments: {result}")
+                    if result is not None:
+                        results.append(result)
+                else:
+                    # Non-tool step - use LLM directly
+                    result = await self.llm.achat(query=step.description)
+                    results.append(result)
+                    
+            except Exception as e:
+                if verbose:
+                    logger.error(f"Error in step {step_num}: {str(e)}")
+                if step.requires_tool:
+                    if verbose:
+                        logger.error(f"Error executing tool {step.tool_name}: {str(e)}")
+                    raise
+            if verbose:
+                logger.info(f"Step {step_num}/{len(plan.steps)} completed.")
+        return results
+
+    async def _astream_summary(self, task: str, results: List[Any], verbose:bool) -> AsyncGenerator[str, None]:
+        """Stream the summary tokens as the LLM produces them"""
+        if verbose:
+            logger.info("Streaming summary...")
+        
+        async for token in self.llm.astream_chat(query=self._build_summary_prompt(task, results)):
+            yield token
+
     async def run(
         self,
         query: str,
@@ -120,43 +171,7 @@ class ReActAgent(BaseAgent):
             logger.info(f"\nProcessing query: {query}")
         
         try:
-            # Generate plan
-            plan = await self._get_initial_plan(query,verbose)
-            
-            if verbose:
-                logger.info("\nExecuting plan...")
-            
-            # Execute all steps and collect results
-            results = []
-            for step_num, step in enumerate(plan.steps, 1):
-                if step_num > max_steps:
-                    break
-                    
-                if verbose:
-                    logger.info(f"\nStep {step_num}/{len(plan.steps)}: {step.description}")
-                
-                try:
-                    if step.requires_tool:
-                        result = await self._execute_tool(step.tool_name, step.description,step.requires_tool)
-                        if verbose:
-                            logger.info(f"Tool {step.tool_name} executed successfully with arguments: {result}")
-                        if result is not None:
-                            results.append(result)
-                    else:
-                        # Non-tool step - use LLM directly
-                        result = await self.llm.achat(query=step.description)
-                        results.append(result)
-                        
-                except Exception as e:
-                    if verbose:
-                        logger.error(f"Error in step {step_num}: {str(e)}")
-                    if step.requires_tool:
-                        if verbose:
-                            logger.error(f"Error executing tool {step.tool_name}: {str(e)}")
-                        raise
-                if verbose:
-                    logger.info(f"Step {step_num}/{len(plan.steps)} completed.")
-                        
+            results = await self._execute_plan(query, max_steps, verbose)
             # Generate final summary
             return await self._generate_summary(query, results, verbose)
             
@@ -309,19 +324,10 @@ class ReActAgent(BaseAgent):
                 ):
                     yield token
             else:
-                # Otherwise, just run the normal flow and stream the final result
-                result = await self.run(
-                    query=query,
-                    max_steps=max_steps,
-                    verbose=verbose,
-                    chat_history=chat_history
-                )
-                
-                # Stream the final result in chunks to simulate streaming
-                chunk_size = 5
-                for i in range(0, len(result), chunk_size):
-                    yield result[i:i+chunk_size]
-                    await asyncio.sleep(0.01)
+                # Otherwise, run the plan and stream the final summary as it is generated
+                results = await self._execute_plan(query, max_steps, verbose)
+                async for token in self._astream_summary(query, results, verbose):
+                    yield token
         
         finally:
             if self.callbacks:
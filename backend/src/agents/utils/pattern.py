@@ -1,18 +1,26 @@
-from typing import Any, List, Optional
+from collections import deque
+from typing import Any, Deque, List, Optional
 from llama_index.core.llms import ChatMessage
 
 class ChatHistory:
     def __init__(self, initial_messages: List[ChatMessage], max_length: int):
-        self.messages = initial_messages
+        # The first (system) message is pinned, the rest is a bounded window
+        # that drops the oldest message in O(1) when full
+        self.first_message: Optional[ChatMessage] = initial_messages[0] if initial_messages else None
+        self.messages: Deque[ChatMessage] = deque(initial_messages[1:], maxlen=max_length - 1)
         self.max_length = max_length
 
     def add(self, role: str, content: str):
-        self.messages.append(ChatMessage(role=role, content=content))
-        if len(self.messages) > self.max_length:
-            self.messages = [self.messages[0]] + self.messages[-(self.max_length-1):]
+        message = ChatMessage(role=role, content=content)
+        if self.first_message is None:
+            self.first_message = message
+        else:
+            self.messages.append(message)
 
     def get_messages(self) -> List[ChatMessage]:
-        return self.messages
+        if self.first_message is None:
+            return []
+        return [self.first_message, *self.messages]
     
 class PlanStep:
     def __init__(self, description: str, requires_tool: bool = False, tool_name: str = None):
@@ -0,0 +1,7 @@
+from .query_cache import QueryCache
+from .semantic_cache import SemanticCache
+from .embedding_cache import EmbeddingCache, get_embedding_cache
+from .response_cache import ResponseCache, get_response_cache
+from .single_flight import SingleFlight
+
+__all__ = ["QueryCache", "SemanticCache", "EmbeddingCache", "get_embedding_cache", "ResponseCache", "get_response_cache", "SingleFlight"]
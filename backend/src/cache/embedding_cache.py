@@ -0,0 +1,90 @@
+import hashlib
+import sqlite3
+import threading
+from typing import List, Optional
+
+import numpy as np
+from cachetools import LRUCache
+
+from src.config import get_settings
+from src.logger import get_formatted_logger
+
+logger = get_formatted_logger(__file__)
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of text embeddings, optionally persisted to SQLite
+
+    Vectors are kept as float32 arrays, half the memory of Python float lists.
+    """
+    def __init__(self, maxsize: int = 10000, persist_path: Optional[str] = None):
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, embedding BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(text: str, namespace: str = "") -> str:
+        """
+        Build the cache key from the SHA-256 of the normalized text
+
+        Args:
+            text: Text that is embedded
+            namespace: Model/settings identifier so different models never share vectors
+        """
+        return hashlib.sha256(f"{namespace}|{text.strip()}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None or self._db is None:
+                return vector
+            row = self._db.execute(
+                "SELECT embedding FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            vector = np.frombuffer(row[0], dtype=np.float32)
+            self._cache[key] = vector
+            return vector
+
+    def put(self, key: str, vector: List[float] | np.ndarray) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._cache[key] = vector
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, embedding) VALUES (?, ?)",
+                    (key, vector.tobytes()),
+                )
+                self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Get the process-wide embedding cache, or None when it is disabled
+    """
+    global _embedding_cache
+    config = get_settings().EMBEDDING_CACHE_CONFIG
+    if not config.enabled:
+        return None
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(
+                maxsize=config.maxsize,
+                persist_path=config.persist_path,
+            )
+            logger.info(f"Initialized embedding cache (maxsize={config.maxsize})")
+    return _embedding_cache
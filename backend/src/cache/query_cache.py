@@ -0,0 +1,56 @@
+import asyncio
+import hashlib
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+
+
+class QueryCache:
+    """
+    Async-safe LRU cache with TTL for RAG query results
+    """
+    def __init__(self, maxsize: int = 1024, ttl: int = 300):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query: str, collection_name: str, limit: int) -> str:
+        """
+        Build the cache key from the normalized query, collection and limit
+        """
+        query_hash = hashlib.blake2b(query.strip().lower().encode()).hexdigest()
+        return f"{query_hash}|{collection_name}|{limit}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        async with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    async def set(self, key: str, value: Any) -> None:
+        async with self._lock:
+            self._cache[key] = value
+
+    async def invalidate(self, collection_name: str) -> None:
+        """
+        Drop every cached result of a collection, e.g. after its documents changed
+        """
+        async with self._lock:
+            for key in [key for key in self._cache if key.split("|")[1] == collection_name]:
+                self._cache.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "ttl": self._cache.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
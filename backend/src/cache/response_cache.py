@@ -0,0 +1,120 @@
+import enum
+import functools
+import hashlib
+import inspect
+from typing import Any, Callable, Optional
+
+from cachetools import TTLCache
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from src.config import get_settings
+from src.logger import get_formatted_logger
+
+logger = get_formatted_logger(__file__)
+
+# Extra endpoint parameter the request is injected into, for conditional GETs
+REQUEST_PARAM = "cache_request"
+
+
+class ResponseCache:
+    """
+    In-process TTL cache of serialized GET responses, grouped by namespace
+
+    Cached endpoints are keyed on their path/query parameters only, injected
+    dependencies (DB session, services) are ignored. Write endpoints drop
+    every entry of the namespaces they touch.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: int = 60):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def make_key(namespace: str, name: str, params: dict) -> str:
+        """
+        Build the cache key from the endpoint name and its plain parameters
+        """
+        values = []
+        for key, value in sorted(params.items()):
+            if isinstance(value, enum.Enum):
+                value = value.value
+            if value is None or isinstance(value, (str, int, float, bool)):
+                values.append(f"{key}={value}")
+        return f"{namespace}:{name}:{'&'.join(values)}"
+
+    def cached(self, namespace: str, response_model: Any, exclude_none: bool = False) -> Callable:
+        """
+        Cache the JSON body of an endpoint validated against `response_model`
+
+        Hits are returned as a ready `Response`, skipping the DB query and the
+        response model validation. With `exclude_none`, null fields are left out
+        of the body, as `response_model_exclude_none` would.
+
+        Responses carry a weak ETag of the body, a request whose If-None-Match
+        matches it gets an empty 304 Not Modified.
+        """
+        adapter = TypeAdapter(response_model)
+
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                request: Request = kwargs.pop(REQUEST_PARAM)
+                key = self.make_key(namespace, func.__name__, kwargs)
+                entry = self._cache.get(key)
+                if entry is None:
+                    result = await func(*args, **kwargs)
+                    body = adapter.dump_json(
+                        adapter.validate_python(result, from_attributes=True), exclude_none=exclude_none
+                    )
+                    entry = (body, f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+                    self._cache[key] = entry
+                body, etag = entry
+                if etag in self._parse_if_none_match(request):
+                    return Response(status_code=304, headers={"ETag": etag})
+                return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+            # Let FastAPI inject the request without changing the endpoint signature
+            signature = inspect.signature(func)
+            wrapper.__signature__ = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            ])
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _parse_if_none_match(request: Request) -> list[str]:
+        header = request.headers.get("if-none-match", "")
+        return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+    def invalidates(self, *namespaces: str) -> Callable:
+        """
+        Drop the cached responses of `namespaces` once the endpoint succeeded
+        """
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                result = await func(*args, **kwargs)
+                self.invalidate(*namespaces)
+                return result
+            return wrapper
+        return decorator
+
+    def invalidate(self, *namespaces: str) -> None:
+        prefixes = tuple(f"{namespace}:" for namespace in namespaces)
+        for key in [key for key in self._cache if key.startswith(prefixes)]:
+            self._cache.pop(key, None)
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the process-wide response cache
+    """
+    global _response_cache
+    if _response_cache is None:
+        config = get_settings().RESPONSE_CACHE_CONFIG
+        _response_cache = ResponseCache(maxsize=config.maxsize, ttl=config.ttl)
+        logger.info(f"Initialized response cache (maxsize={config.maxsize}, ttl={config.ttl})")
+    return _response_cache
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Async-safe cache of RAG query results keyed by the query embedding
+
+    Paraphrased queries embed close to each other, so a stored response is
+    served when the cosine similarity of the query embeddings exceeds
+    `threshold`. Entries are grouped by namespace (collection and limit) and
+    each namespace keeps its `maxsize` most recent entries.
+
+    A namespace holds its normalized embeddings as one contiguous float32
+    matrix, a lookup is a single matrix-vector product against it.
+    """
+    def __init__(self, threshold: float = 0.95, maxsize: int = 256, ttl: int = 300):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # namespace -> (expiry times, embedding matrix, values), row aligned
+        self._entries: Dict[str, Tuple[np.ndarray, np.ndarray, List[Any]]] = {}
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_namespace(collection_name: str, limit: int) -> str:
+        return f"{collection_name}|{limit}"
+
+    @staticmethod
+    def _normalize(embedding: List[float] | np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _live_entries(self, namespace: str, now: float) -> Optional[Tuple[np.ndarray, np.ndarray, List[Any]]]:
+        """Get the unexpired entries of a namespace, dropping the expired ones"""
+        entries = self._entries.get(namespace)
+        if entries is None:
+            return None
+        expires, matrix, values = entries
+        alive = expires > now
+        if not alive.all():
+            if not alive.any():
+                del self._entries[namespace]
+                return None
+            keep = np.flatnonzero(alive)
+            entries = (expires[keep], matrix[keep], [values[i] for i in keep])
+            self._entries[namespace] = entries
+        return entries
+
+    async def get(self, namespace: str, embedding: List[float] | np.ndarray) -> Optional[Any]:
+        vector = self._normalize(embedding)
+        now = time.monotonic()
+        async with self._lock:
+            entries = self._live_entries(namespace, now)
+            if entries is not None:
+                _, matrix, values = entries
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self.hits += 1
+                    return values[best]
+            self.misses += 1
+            return None
+
+    async def set(self, namespace: str, embedding: List[float] | np.ndarray, value: Any) -> None:
+        vector = self._normalize(embedding)
+        expiry = np.array([time.monotonic() + self.ttl])
+        async with self._lock:
+            entries = self._live_entries(namespace, time.monotonic())
+            if entries is None:
+                self._entries[namespace] = (expiry, vector[np.newaxis, :], [value])
+                return
+            expires, matrix, values = entries
+            # Only the `maxsize` most recent rows are kept
+            self._entries[namespace] = (
+                np.concatenate((expires, expiry))[-self.maxsize:],
+                np.vstack((matrix, vector))[-self.maxsize:],
+                (values + [value])[-self.maxsize:],
+            )
+
+    async def invalidate(self, collection_name: str) -> None:
+        """
+        Drop every cached result of a collection, e.g. after its documents changed
+        """
+        async with self._lock:
+            for namespace in [namespace for namespace in self._entries if namespace.split("|")[0] == collection_name]:
+                self._entries.pop(namespace, None)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": sum(len(values) for _, _, values in self._entries.values()),
+            "threshold": self.threshold,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
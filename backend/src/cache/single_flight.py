@@ -0,0 +1,33 @@
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls sharing a key into a single execution
+
+    The first caller starts the call, callers arriving while it is in flight
+    await the same result (or exception) instead of repeating the work. The
+    call is shielded, a caller that goes away does not cancel it for the others.
+    """
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build the key from the parts identifying the call
+        """
+        return hashlib.blake2b("|".join(str(part) for part in parts).encode()).hexdigest()
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._calls)
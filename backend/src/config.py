@@ -1,7 +1,9 @@
 # config.py
 import enum
+from functools import lru_cache
+from typing import Literal, Optional
 from pydantic import BaseModel
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
 import dotenv
 
@@ -26,6 +28,54 @@ class RAGConfig(BaseModel):
     default_collection: str = "documents"
     max_results: int = 5
     similarity_threshold: float = 0.7
+    batch_size: int = 32  # Chunks per embedding request / Qdrant upsert
+    max_concurrency: int = 4  # Concurrent embedding batches during ingestion
+    max_processing_documents: int = 4  # Documents ingested at once by background tasks
+    processing_timeout: int = 3600  # seconds before a document stuck in processing can be re-queued
+    quantization: Literal["scalar", "binary", "none"] = "scalar"  # Qdrant vector quantization
+
+class QueryCacheConfig(BaseModel):
+    """Configuration for the RAG query result cache"""
+    maxsize: int = 1024
+    ttl: int = 300  # seconds
+
+class SemanticCacheConfig(BaseModel):
+    """Configuration for the RAG query cache keyed by query embedding"""
+    enabled: bool = True
+    threshold: float = 0.95  # minimum cosine similarity to serve a cached result
+    maxsize: int = 256  # entries per collection
+    ttl: int = 300  # seconds
+
+class ChatCacheConfig(BaseModel):
+    """
+    Configuration for the cache of agent answers
+
+    Only agents whose tools are all knowledge base searches are cached. The cache
+    is per worker: invalidations after agent or document changes only reach the
+    worker that made them, other workers may serve answers up to `ttl` old.
+    """
+    enabled: bool = False
+    maxsize: int = 1024
+    ttl: int = 300  # seconds
+
+class ResponseCacheConfig(BaseModel):
+    """Configuration for the GET response cache"""
+    maxsize: int = 1024
+    ttl: int = 60  # seconds
+
+class EmbeddingCacheConfig(BaseModel):
+    """Configuration for the text embedding cache"""
+    enabled: bool = True
+    maxsize: int = 10000  # ~30MB for 768-dim float32 vectors
+    persist_path: Optional[str] = None  # SQLite file to keep embeddings across restarts
+
+class DatabasePoolConfig(BaseModel):
+    """Configuration for the SQLAlchemy connection pool"""
+    pool_size: int = 20
+    max_overflow: int = 40
+    pool_timeout: int = 30  # seconds to wait for a free connection
+    pool_recycle: int = 3600  # below MySQL wait_timeout so stale connections are replaced
+    pool_pre_ping: bool = True
 
 class LLMConfig(BaseModel):
     """Configuration for Language Models"""
@@ -53,6 +103,7 @@ class AWSConfig(BaseModel):
 class Settings(BaseSettings):
     """Main application settings"""
     QDRANT_URL: str = os.getenv('QDRANT_URL', "http://qdrant:6333")
+    QDRANT_PREFER_GRPC: bool = os.getenv('QDRANT_PREFER_GRPC', 'false').lower() == 'true'
     GOOGLE_API_KEY: str = os.getenv('GOOGLE_API_KEY', '')
     BACKEND_API_URL: str = os.getenv('BACKEND_API_URL', 'http://localhost:8000')
     
@@ -63,10 +114,21 @@ class Settings(BaseSettings):
     MYSQL_PORT : str=os.getenv('MYSQL_PORT', '3306')
     MYSQL_DB : str=os.getenv('MYSQL_DB', 'ragagent')
     MYSQL_ALLOW_EMPTY_PASSWORD: str=os.getenv('MYSQL_ALLOW_EMPTY_PASSWORD', 'yes')
+    DATABASE_POOL_CONFIG: DatabasePoolConfig = DatabasePoolConfig(
+        pool_size=int(os.getenv('DB_POOL_SIZE', 20)),
+        max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 40)),
+    )
+    
+    MAX_UPLOAD_BYTES: int = int(os.getenv('MAX_UPLOAD_BYTES', 50 * 1024 * 1024))  # 50MB
     
     # Component configurations
     READER_CONFIG: ReaderConfig = ReaderConfig()
     RAG_CONFIG: RAGConfig = RAGConfig()
+    QUERY_CACHE_CONFIG: QueryCacheConfig = QueryCacheConfig()
+    SEMANTIC_CACHE_CONFIG: SemanticCacheConfig = SemanticCacheConfig()
+    RESPONSE_CACHE_CONFIG: ResponseCacheConfig = ResponseCacheConfig()
+    CHAT_CACHE_CONFIG: ChatCacheConfig = ChatCacheConfig()
+    EMBEDDING_CACHE_CONFIG: EmbeddingCacheConfig = EmbeddingCacheConfig()
     
     AWS_ACCESS_KEY_ID:str=os.getenv('AWS_ACCESS_KEY_ID', ''),
     AWS_SECRET_ACCESS_KEY:str=os.getenv('AWS_SECRET_ACCESS_KEY', ''),
@@ -101,5 +163,11 @@ class Settings(BaseSettings):
         system_prompt=LLM_SYSTEM_PROMPT
     )
     
-    class Config:
-        env_file = ".env"
\ No newline at end of file
+    model_config = SettingsConfigDict(env_file=".env")
+
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Get the process-wide settings, the environment and .env are only read once
+    """
+    return Settings()
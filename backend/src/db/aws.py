@@ -2,19 +2,30 @@ import logging
 import sys
 from src.logger import get_formatted_logger
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from pathlib import Path
 from fastapi import Depends
-from typing import Annotated
+from collections import defaultdict
+from typing import Annotated, BinaryIO, Dict, List
 from botocore.exceptions import ClientError
 from tenacity import retry, stop_after_attempt, wait_fixed, after_log, before_sleep_log
-from src.config import Settings
+from src.config import Settings, get_settings
 sys.path.append(str(Path(__file__).parent.parent.parent.parent))
 from urllib.parse import urlparse
 logger = get_formatted_logger(__file__)
 
+# Files above 8MB go up/down as 8MB parts, up to 8 of them in parallel
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
+
 def get_aws_s3_client(
 ) -> "S3Client":
-    settings =Settings()
+    settings = get_settings()
     return S3Client(
         aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
@@ -42,7 +53,8 @@ class S3Client:
         aws_secret_access_key: str,
         region_name: str,
         storage_type :str,
-        endpoint_url:str
+        endpoint_url:str,
+        max_pool_connections: int = 50
     ):
         """
         Initialize AWS S3 client
@@ -51,6 +63,7 @@ class S3Client:
             aws_access_key_id (str): AWS access key ID
             aws_secret_access_key (str): AWS secret access key
             region_name (str): AWS region name (e.g., 'us-east-1')
+            max_pool_connections (int): Size of the kept-alive HTTP connection pool
         """
         self.region_name = region_name
         self.storage_type =storage_type
@@ -61,7 +74,14 @@ class S3Client:
             aws_access_key_id=aws_access_key_id,
             aws_secret_access_key=aws_secret_access_key,
             region_name=region_name,
-            endpoint_url=endpoint_url
+            endpoint_url=endpoint_url,
+            # The client is shared by concurrent requests and multipart transfers;
+            # a larger pool with TCP keep-alive lets them reuse connections instead
+            # of re-doing the TCP + TLS handshake once the default 10 are busy
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                tcp_keepalive=True,
+            ),
         )
         self.test_connection()
         logger.info("S3Client initialized successfully!")
@@ -150,6 +170,7 @@ class S3Client:
                 Filename=file_path,
                 Bucket=bucket_name,
                 Key=object_name,
+                Config=TRANSFER_CONFIG,
                 # ExtraArgs={'ACL':'public-read'}
             )
             logger.info(f"Uploaded: {file_path} --> {bucket_name}/{object_name}")
@@ -158,6 +179,36 @@ class S3Client:
             logger.error(f"Upload failed: {str(e)}")
             raise e
 
+    @retry(stop=stop_after_attempt(3))
+    def upload_fileobj(
+        self, bucket_name: str, object_name: str, file_obj: BinaryIO
+    ) -> None:
+        """
+        Upload a file object to S3
+
+        Args:
+            bucket_name (str): Bucket name
+            object_name (str): Object name to save in S3
+            file_obj (BinaryIO): Binary file object opened for reading
+        """
+        if self.check_bucket_exists(bucket_name) is False:
+            logger.debug(f"Bucket {bucket_name} does not exist. Creating bucket...")
+            self.create_bucket(bucket_name)
+        try:
+            # A retried attempt starts over from the beginning of the file
+            file_obj.seek(0)
+            self.client.upload_fileobj(
+                Fileobj=file_obj,
+                Bucket=bucket_name,
+                Key=object_name,
+                Config=TRANSFER_CONFIG,
+            )
+            logger.info(f"Uploaded: file object --> {bucket_name}/{object_name}")
+            return f"https://{bucket_name}.{self.storage_type}.{self.region_name}.amazonaws.com/{object_name}"
+        except Exception as e:
+            logger.error(f"Upload failed: {str(e)}")
+            raise e
+
     def download_file(self, file_url: str, file_path_to_save: str):
         """
         Download file from S3
@@ -181,7 +232,8 @@ class S3Client:
             self.client.download_file(
                 Bucket=bucket_name,
                 Key=object_name,
-                Filename=file_path_to_save
+                Filename=file_path_to_save,
+                Config=TRANSFER_CONFIG,
             )
             logger.info(f"Downloaded: {bucket_name}/{object_name} --> {file_path_to_save}")
         except ClientError as e:
@@ -216,6 +268,40 @@ class S3Client:
             logger.error(f"Remove failed: {str(e)}")
             raise
 
+    def remove_files(self, object_names: List[str]) -> None:
+        """
+        Remove several files from S3 with one DeleteObjects request per bucket
+
+        Args:
+            object_names (List[str]): Object URLs to remove
+        """
+        keys_by_bucket: Dict[str, List[str]] = defaultdict(list)
+        for object_name in object_names:
+            parsed = urlparse(object_name)
+            bucket_name = parsed.netloc.split('.')[0]
+            keys_by_bucket[bucket_name].append(parsed.path.lstrip('/'))
+
+        try:
+            for bucket_name, keys in keys_by_bucket.items():
+                self._delete_objects(bucket_name, keys)
+                logger.debug(f"Removed {len(keys)} objects from S3 bucket {bucket_name}")
+        except ClientError as e:
+            logger.error(f"Remove failed: {str(e)}")
+            raise
+
+    def _delete_objects(self, bucket_name: str, keys: List[str]) -> None:
+        """
+        Delete keys of a bucket in batches of 1000, the DeleteObjects limit
+        """
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=bucket_name,
+                Delete={
+                    "Objects": [{"Key": key} for key in keys[start:start + 1000]],
+                    "Quiet": True,
+                },
+            )
+
     def remove_bucket(self, bucket_name: str) -> None:
         """
         Remove bucket from S3
@@ -232,11 +318,7 @@ class S3Client:
             paginator = self.client.get_paginator('list_objects_v2')
             for page in paginator.paginate(Bucket=bucket_name):
                 if 'Contents' in page:
-                    for obj in page['Contents']:
-                        self.client.delete_object(
-                            Bucket=bucket_name,
-                            Key=obj['Key']
-                        )
+                    self._delete_objects(bucket_name, [obj['Key'] for obj in page['Contents']])
 
             # Delete the bucket itself
             self.client.delete_bucket(Bucket=bucket_name)
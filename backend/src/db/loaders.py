@@ -0,0 +1,82 @@
+import types
+from typing import Any, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+
+class LoadGenerator:
+    """
+    Build `selectinload` chains from the shape of a response schema
+
+    Every schema field named after a relationship of the model is loaded with
+    one SELECT ... IN query, recursing into nested response schemas. A
+    `List[AgentResponse]` of communications thus loads agents, their
+    knowledge bases and their RAG configs in one query per level instead of
+    one lazy load per row, which AsyncSession cannot do anyway.
+
+    With `only_columns`, every level also loads just the columns the schema
+    serializes (plus the keys relationships are joined on), leaving e.g. the
+    document contents out of a document list.
+    """
+
+    @staticmethod
+    def _nested_schema(annotation: Any) -> Optional[Type[BaseModel]]:
+        """Get the response schema wrapped in Optional/List, if any"""
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return annotation
+        if get_origin(annotation) in (Union, types.UnionType, list, tuple, set):
+            for arg in get_args(annotation):
+                schema = LoadGenerator._nested_schema(arg)
+                if schema is not None:
+                    return schema
+        return None
+
+    @staticmethod
+    def _columns(model: type, schema: Type[BaseModel]) -> Optional[LoaderOption]:
+        """Get the `load_only` option of the schema's columns, or None when it needs them all"""
+        mapper = inspect(model)
+        names = {name for name in schema.model_fields if name in mapper.column_attrs}
+        for name in schema.model_fields:
+            if name in mapper.relationships:
+                names.update(column.key for column in mapper.relationships[name].local_columns)
+        if names >= set(mapper.column_attrs.keys()):
+            return None
+        return load_only(*(getattr(model, name) for name in names if name in mapper.column_attrs))
+
+    @staticmethod
+    def from_schema(
+        model: type,
+        schema: Type[BaseModel],
+        only_columns: bool = False,
+        _seen: Tuple[type, ...] = (),
+    ) -> Tuple[LoaderOption, ...]:
+        """
+        Get the loader options serializing `model` rows as `schema` needs
+
+        Args:
+            model: SQLAlchemy model that is queried
+            schema: Pydantic response schema the rows are validated against
+            only_columns: Defer the columns the schema does not serialize
+        """
+        relationships = inspect(model).relationships
+        options = []
+        if only_columns:
+            columns = LoadGenerator._columns(model, schema)
+            if columns is not None:
+                options.append(columns)
+        for name, field in schema.model_fields.items():
+            if name not in relationships:
+                continue
+            loader = selectinload(getattr(model, name))
+            nested_schema = LoadGenerator._nested_schema(field.annotation)
+            if nested_schema is not None and nested_schema not in _seen + (schema,):
+                nested_options = LoadGenerator.from_schema(
+                    relationships[name].mapper.class_, nested_schema, only_columns, _seen + (schema,)
+                )
+                if nested_options:
+                    loader = loader.options(*nested_options)
+            options.append(loader)
+        return tuple(options)
@@ -1,11 +1,9 @@
 # src/database/models.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Enum, Boolean, Float, create_engine, Index
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Enum, Boolean, Float, Index, LargeBinary
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 import enum
-from src.config import Settings
 
-settings = Settings()
 Base = declarative_base()
 
 class CommunicationRole(enum.Enum):
@@ -68,13 +66,13 @@ class Agent(Base):
     is_active = Column(Boolean, default=True)
     configuration = Column(JSON)  # Agent-specific configuration
     
-    # Relationships
+    # Relationships, link rows go with the agent through ON DELETE CASCADE
     llm_foundations = relationship("LLMFoundation", back_populates="agents")
     llm_configs = relationship("LLMConfig", back_populates="agents")
-    conversations = relationship("Conversation", secondary="agent_conversations", back_populates="agents")
-    communications = relationship("Communication", secondary="communication_agent_members", back_populates="agents")
-    tools = relationship("Tool", secondary="agent_tools", back_populates="agents")
-    knowledge_bases = relationship("KnowledgeBase", secondary="agent_knowledge_bases", back_populates="agents")
+    conversations = relationship("Conversation", secondary="agent_conversations", back_populates="agents", passive_deletes=True)
+    communications = relationship("Communication", secondary="communication_agent_members", back_populates="agents", passive_deletes=True)
+    tools = relationship("Tool", secondary="agent_tools", back_populates="agents", passive_deletes=True)
+    knowledge_bases = relationship("KnowledgeBase", secondary="agent_knowledge_bases", back_populates="agents", passive_deletes=True)
 
 class Communication(Base):
     __tablename__ = "communications"
@@ -95,7 +93,7 @@ class CommunicationAgentMember(Base):
     __tablename__ = "communication_agent_members"
     
     communication_id = Column(Integer, ForeignKey("communications.id"), primary_key=True)
-    agent_id = Column(Integer, ForeignKey("agents.id"), primary_key=True)
+    agent_id = Column(Integer, ForeignKey("agents.id", ondelete="CASCADE"), primary_key=True)
     role = Column(Enum(CommunicationRole))  # e.g., "leader", "member"
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -106,6 +104,11 @@ class CommunicationConversation(Base):
     conversation_id = Column(Integer, ForeignKey("conversations.id"), primary_key=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # The primary key leads with communication_id, lookups by conversation need their own index
+    __table_args__ = (
+        Index("ix_comm_conv_conv", "conversation_id"),
+    )
+
 class LLMFoundation(Base):
     __tablename__ = "llm_foundations"
     
@@ -166,16 +169,27 @@ class Message(Base):
     content = Column(Text)
     type = Column(Enum(MessageType))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Messages are always fetched per conversation in creation order
+    __table_args__ = (
+        Index("ix_msg_conv", "conversation_id", "created_at"),
+    )
+
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
 
 class AgentConversation(Base):
     __tablename__ = "agent_conversations"
     
-    agent_id = Column(Integer, ForeignKey("agents.id"), primary_key=True)
+    agent_id = Column(Integer, ForeignKey("agents.id", ondelete="CASCADE"), primary_key=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id"), primary_key=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # The primary key leads with agent_id, lookups by conversation need their own index
+    __table_args__ = (
+        Index("ix_agent_conv_conv", "conversation_id"),
+    )
+
 class RAGConfig(Base):
     __tablename__ = "rag_configs"
     
@@ -237,7 +251,7 @@ class DocumentChunk(Base):
     document_id = Column(Integer, ForeignKey("documents.id"))
     content = Column(Text, nullable=False)
     chunk_index = Column(Integer)
-    dense_embedding = Column(JSON, nullable=True)
+    dense_embedding = Column(LargeBinary, nullable=True)  # float32 bytes, np.frombuffer(..., dtype=np.float32)
     sparse_embedding = Column(JSON, nullable=True)
     extra_info = Column(JSON)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -265,18 +279,13 @@ class Tool(Base):
 class AgentKnowledgeBase(Base):
     __tablename__ = "agent_knowledge_bases"
     
-    agent_id = Column(Integer, ForeignKey("agents.id"), primary_key=True)
+    agent_id = Column(Integer, ForeignKey("agents.id", ondelete="CASCADE"), primary_key=True)
     knowledge_base_id = Column(Integer, ForeignKey("knowledge_bases.id"), primary_key=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class AgentTool(Base):
     __tablename__ = "agent_tools"
     
-    agent_id = Column(Integer, ForeignKey("agents.id"), primary_key=True)
+    agent_id = Column(Integer, ForeignKey("agents.id", ondelete="CASCADE"), primary_key=True)
     tool_id = Column(Integer, ForeignKey("tools.id"), primary_key=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
-
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-Base.metadata.create_all(engine)
\ No newline at end of file
@@ -1,17 +1,135 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from src.config import Settings
+import json
+from typing import AsyncGenerator, Optional
+import numpy as np
+from sqlalchemy import Connection, JSON, LargeBinary, bindparam, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from src.config import get_settings
+from src.db.models import Base
+from src.logger import get_formatted_logger
 
-settings = Settings()
+logger = get_formatted_logger(__file__)
 
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
+settings = get_settings()
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_SQLALCHEMY_DATABASE_URL = f"mysql+aiomysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}"
 
-def get_db():
-    db = SessionLocal()
+# Default QueuePool (5 + 10 overflow) runs dry under concurrent requests
+pool_options = settings.DATABASE_POOL_CONFIG.model_dump()
+
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **pool_options)
+# Objects stay usable after commit, an expired attribute would need IO to reload
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+def create_missing_indexes(connection: Connection) -> None:
+    """
+    Create the indexes declared on the models but missing from the database,
+    create_all only creates indexes together with a new table
+    """
+    def existing_indexes() -> set:
+        return {
+            (row.table_name, row.index_name)
+            for row in connection.execute(text(
+                "SELECT DISTINCT table_name AS table_name, index_name AS index_name "
+                "FROM information_schema.statistics WHERE table_schema = DATABASE()"
+            ))
+        }
+
+    existing = existing_indexes()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if (table.name, index.name) in existing:
+                continue
+            logger.warning(f"Creating missing index {index.name} on {table.name}")
+            try:
+                index.create(connection)
+            except DBAPIError:
+                connection.rollback()
+                # Another worker starting at the same time may have created it
+                if (table.name, index.name) not in existing_indexes():
+                    raise
+    connection.commit()
+
+# Rows re-encoded per round trip when upgrading document_chunks.dense_embedding
+DENSE_EMBEDDING_UPGRADE_BATCH = 1000
+
+def _decode_json_embedding(raw: str | bytes) -> Optional[bytes]:
+    """Re-encode a dense embedding stored as JSON into float32 bytes"""
+    value = json.loads(raw)
+    # Older rows hold the list JSON-encoded a second time, as a JSON string
+    if isinstance(value, str):
+        value = json.loads(value)
+    if value is None:
+        return None
+    return np.asarray(value, dtype=np.float32).tobytes()
+
+def upgrade_dense_embedding_column(connection: Connection) -> None:
+    """
+    Convert document_chunks.dense_embedding from JSON to float32 BLOB on tables
+    created before the column type changed, create_all never alters a table
+
+    Values are copied into a BLOB column which then replaces the JSON one. Every
+    step can be re-run, so an interrupted upgrade resumes at the next startup.
+    """
+    def needs_upgrade() -> bool:
+        columns = {column["name"]: column["type"] for column in inspect(connection).get_columns("document_chunks")}
+        return isinstance(columns.get("dense_embedding"), JSON) or "dense_embedding_f32" in columns
+
+    if not needs_upgrade():
+        return
+
+    # Workers start together, only one of them runs the upgrade
+    if not connection.scalar(text("SELECT GET_LOCK('upgrade_dense_embedding', 600)")):
+        raise RuntimeError("Timed out waiting for the document_chunks.dense_embedding upgrade lock")
     try:
-        yield db
+        # Another worker may have finished the upgrade while this one waited
+        if not needs_upgrade():
+            return
+        columns = {column["name"]: column["type"] for column in inspect(connection).get_columns("document_chunks")}
+        if isinstance(columns.get("dense_embedding"), JSON):
+            logger.warning("Converting document_chunks.dense_embedding from JSON to float32 BLOB")
+            if "dense_embedding_f32" not in columns:
+                connection.execute(text("ALTER TABLE document_chunks ADD COLUMN dense_embedding_f32 BLOB NULL"))
+
+            # Keyset batches, only rows not converted yet
+            last_id = 0
+            while True:
+                rows = connection.execute(
+                    text(
+                        "SELECT id, dense_embedding FROM document_chunks "
+                        "WHERE id > :last_id AND dense_embedding IS NOT NULL AND dense_embedding_f32 IS NULL "
+                        "ORDER BY id LIMIT :limit"
+                    ),
+                    {"last_id": last_id, "limit": DENSE_EMBEDDING_UPGRADE_BATCH},
+                ).all()
+                if not rows:
+                    break
+                connection.execute(
+                    text("UPDATE document_chunks SET dense_embedding_f32 = :value WHERE id = :id")
+                    .bindparams(bindparam("value", type_=LargeBinary)),
+                    [{"id": row.id, "value": _decode_json_embedding(row.dense_embedding)} for row in rows],
+                )
+                connection.commit()
+                last_id = rows[-1].id
+
+            connection.execute(text("ALTER TABLE document_chunks DROP COLUMN dense_embedding"))
+        # Also completes an upgrade interrupted between the DROP and the RENAME
+        connection.execute(text("ALTER TABLE document_chunks RENAME COLUMN dense_embedding_f32 TO dense_embedding"))
+        connection.commit()
+        logger.info("document_chunks.dense_embedding now stores float32 bytes")
     finally:
-        db.close()
\ No newline at end of file
+        connection.execute(text("SELECT RELEASE_LOCK('upgrade_dense_embedding')"))
+        connection.commit()
+
+async def create_tables() -> None:
+    """Create the missing tables and indexes through the application pool, then upgrade changed columns"""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    # The upgrades commit step by step, outside of a single transaction
+    async with async_engine.connect() as conn:
+        await conn.run_sync(create_missing_indexes)
+        await conn.run_sync(upgrade_dense_embedding_column)
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
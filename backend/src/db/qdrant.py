@@ -4,7 +4,7 @@ from pathlib import Path
 import logging
 from abc import ABC, abstractmethod
 from qdrant_client.http import models
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from typing import List, Dict, Any, Optional
 from fastembed.common.types import NumpyArray
 from qdrant_client.http.exceptions import ResponseHandlingException
@@ -86,10 +86,23 @@ class QdrantVectorDatabase(BaseVectorDatabase):
         before_sleep=before_sleep_log(logger, logging.DEBUG),
         retry=retry_if_exception_type(ConnectionError),
     )
-    def __init__(self, url: str, distance: str = models.Distance.COSINE) -> None:
+    def __init__(
+        self,
+        url: str,
+        distance: str = models.Distance.COSINE,
+        quantization: str = "scalar",
+        prefer_grpc: bool = False,
+        use_async_client: bool = True,
+    ) -> None:
         self.url = url
         self.client = QdrantClient(url)
+        # Pooled async client for calls made from the event loop, users that only
+        # call from worker threads go without one
+        self.async_client = (
+            AsyncQdrantClient(url, prefer_grpc=prefer_grpc, timeout=30) if use_async_client else None
+        )
         self.distance = distance
+        self.quantization = quantization
         self.test_connection()
 
         logger.info("Qdrant client initialized successfully !!!")
@@ -106,38 +119,95 @@ class QdrantVectorDatabase(BaseVectorDatabase):
     def check_collection_exists(self, collection_name: str):
         return self.client.collection_exists(collection_name)
 
+    async def acheck_collection_exists(self, collection_name: str):
+        return await self.async_client.collection_exists(collection_name)
+
+    def close(self):
+        """
+        Close the connection pool of the Qdrant client.
+        """
+        self.client.close()
+
+    async def aclose(self):
+        """
+        Close the connection pools of both Qdrant clients.
+        """
+        self.client.close()
+        if self.async_client is not None:
+            await self.async_client.close()
+
+    def _get_quantization_config(self) -> Optional[models.QuantizationConfig]:
+        """
+        Build the collection quantization config from the `quantization` switch
+        """
+        if self.quantization == "scalar":
+            # int8: 4x smaller index, original vectors are only read for rescoring
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True,
+                ),
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=True),
+            )
+        return None
+
+    def _get_collection_config(self, vector_size: int) -> Dict[str, Any]:
+        """
+        Build the create_collection arguments shared by the sync and async clients
+        """
+        quantization_config = self._get_quantization_config()
+        # With quantization the in-RAM quantized copy serves the search, so
+        # the full-precision vectors can stay on disk for rescoring
+        on_disk = quantization_config is not None
+        return dict(
+            vectors_config={
+                "dense": models.VectorParams(
+                    size=vector_size,
+                    distance=self.distance,
+                    on_disk=on_disk,
+                    ),
+                "late-interaction": models.VectorParams(
+                    size=vector_size,
+                    distance=self.distance,
+                    on_disk=on_disk,
+                    multivector_config=models.MultiVectorConfig(
+                        comparator=models.MultiVectorComparator.MAX_SIM
+                    ),
+                )
+            },
+            sparse_vectors_config={
+                "sparse": models.SparseVectorParams(
+                    index=models.SparseIndexParams(
+                        on_disk=False,
+                    )
+                )
+            },
+            # indexing_threshold is left at the server default: 0 disables the
+            # HNSW index and turns every search into a full distance scan
+            optimizers_config=models.OptimizersConfigDiff(
+                default_segment_number=5,
+            ),
+            quantization_config=quantization_config,
+        )
+
     def create_collection(self, collection_name: str, vector_size: int = 768):
         if not self.client.collection_exists(collection_name):
-            logger.info(f"Creating collection {collection_name}")
+            logger.info(f"Creating collection {collection_name} (quantization={self.quantization})")
             self.client.create_collection(
                 collection_name,
-                vectors_config={
-                    "dense": models.VectorParams(
-                        size=vector_size,
-                        distance=self.distance
-                        ),
-                    "late-interaction": models.VectorParams(
-                        size=vector_size,
-                        distance=self.distance,
-                        multivector_config=models.MultiVectorConfig(
-                            comparator=models.MultiVectorComparator.MAX_SIM
-                        ),
-                    )
-                },
-                sparse_vectors_config={
-                    "sparse": models.SparseVectorParams(
-                        index=models.SparseIndexParams(
-                            on_disk=False,
-                        )
-                    )
-                },
-                optimizers_config=models.OptimizersConfigDiff(
-                    default_segment_number=5,
-                    indexing_threshold=0,
-                ),
-                quantization_config=models.BinaryQuantization(
-                    binary=models.BinaryQuantizationConfig(always_ram=True),
-                ),
+                **self._get_collection_config(vector_size),
+            )
+
+    async def acreate_collection(self, collection_name: str, vector_size: int = 768):
+        if not await self.acheck_collection_exists(collection_name):
+            logger.info(f"Creating collection {collection_name} (quantization={self.quantization})")
+            await self.async_client.create_collection(
+                collection_name,
+                **self._get_collection_config(vector_size),
             )
 
     def add_vector(
@@ -177,6 +247,47 @@ class QdrantVectorDatabase(BaseVectorDatabase):
             ],
         )
 
+    def add_vectors(
+        self,
+        collection_name: str,
+        vector_ids: List[str],
+        dense_vectors: List[List[float]],
+        sparse_vectors: List[dict[str, NumpyArray]],
+        payloads: List[QdrantPayload],
+    ):
+        """
+        Add a batch of vectors to the collection in a single upsert
+
+        Args:
+            collection_name (str): Collection name to add
+            vector_ids (List[str]): Vector IDs
+            dense_vectors (List[List[float]]): Dense vectors
+            sparse_vectors (List[dict[str, NumpyArray]]): Sparse vectors
+            payloads (List[QdrantPayload]): Payloads for the vectors
+        """
+        if not vector_ids:
+            return
+
+        self.client.upsert(
+            collection_name=collection_name,
+            points=[
+                models.PointStruct(
+                    id=vector_id,
+                    payload=payload.model_dump(),
+                    vector={
+                        "dense": dense_vector,
+                        "sparse": models.SparseVector(
+                            indices=sparse_vector.get("indices", []),
+                            values=sparse_vector.get("values", []),
+                        ),
+                    },
+                )
+                for vector_id, dense_vector, sparse_vector, payload in zip(
+                    vector_ids, dense_vectors, sparse_vectors, payloads
+                )
+            ],
+        )
+
     def delete_vector(self, collection_name: str, document_id: str|int):
         """
         Delete a vector from the collection
@@ -185,32 +296,73 @@ class QdrantVectorDatabase(BaseVectorDatabase):
             collection_name (str): Collection name to delete
             document_id (str | int): Document ID to delete
         """
+        self.delete_vectors(collection_name, [document_id])
+
+    def delete_vectors(self, collection_name: str, document_ids: List[str|int]):
+        """
+        Delete the vectors of several documents with a single request
+
+        Args:
+            collection_name (str): Collection name to delete
+            document_ids (List[str | int]): Document IDs to delete
+        """
 
         if not self.check_collection_exists(collection_name):
             logger.debug(f"Collection {collection_name} does not exist")
             return
 
         logger.debug(
-            "collection_name: %s - document_id: %s", collection_name, document_id
+            "collection_name: %s - document_ids: %s", collection_name, document_ids
         )
         try:
             self.client.delete(
                 collection_name,
-                points_selector=models.FilterSelector(
-                    filter=models.Filter(
-                        must=[
-                            models.FieldCondition(
-                                key="document_id",
-                                match=models.MatchValue(value=document_id),
-                            )
-                        ]
-                    )
-                ),
+                points_selector=self._get_documents_selector(document_ids),
+            )
+        except Exception as e:
+            logger.error(f"Error deleting vector: {str(e)}")
+            raise e
+
+    async def adelete_vectors(self, collection_name: str, document_ids: List[str|int]):
+        """
+        Async version of `delete_vectors`
+
+        Args:
+            collection_name (str): Collection name to delete
+            document_ids (List[str | int]): Document IDs to delete
+        """
+        if not await self.acheck_collection_exists(collection_name):
+            logger.debug(f"Collection {collection_name} does not exist")
+            return
+
+        logger.debug(
+            "collection_name: %s - document_ids: %s", collection_name, document_ids
+        )
+        try:
+            await self.async_client.delete(
+                collection_name,
+                points_selector=self._get_documents_selector(document_ids),
             )
         except Exception as e:
             logger.error(f"Error deleting vector: {str(e)}")
             raise e
 
+    @staticmethod
+    def _get_documents_selector(document_ids: List[str|int]) -> models.FilterSelector:
+        """
+        Select every point belonging to one of the documents
+        """
+        return models.FilterSelector(
+            filter=models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="document_id",
+                        match=models.MatchAny(any=document_ids),
+                    )
+                ]
+            )
+        )
+
     def delete_collection(self, collection_name: str):
         """
         Delete a collection
@@ -228,7 +380,23 @@ class QdrantVectorDatabase(BaseVectorDatabase):
             logger.error(f"Error deleting collection: {str(e)}")
             raise e
 
-    
+    async def adelete_collection(self, collection_name: str):
+        """
+        Async version of `delete_collection`
+
+        Args:
+            collection_name (str): Collection name to delete
+        """
+        if not await self.acheck_collection_exists(collection_name):
+            logger.debug(f"Collection {collection_name} does not exist")
+            return
+        try:
+            await self.async_client.delete_collection(collection_name)
+            logger.info(f"Collection {collection_name} deleted successfully")
+        except Exception as e:
+            logger.error(f"Error deleting collection: {str(e)}")
+            raise e
+
     def search_vector(
         self,
         collection_name: str,
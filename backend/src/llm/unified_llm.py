@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Generator, List, Optional
-from llama_index.core.llms import ChatMessage
+from llama_index.core.llms import ChatMessage, MessageRole
 from src.logger import get_formatted_logger
 import asyncio
 from .base import BaseLLM
@@ -9,10 +9,12 @@ from pydantic_settings import BaseSettings
 # from llama_index.llms.anthropic import Anthropic
 from llama_index.llms.gemini import Gemini
 # from llama_index.llms.openai import OpenAI
-from src.config import Settings
+from src.config import get_settings
 
 logger = get_formatted_logger(__file__)
 
+SYSTEM_PROMPT_ACKNOWLEDGEMENT = "I understand and will follow these instructions."
+
 class UnifiedLLM(BaseLLM):
     def __init__(
         self, 
@@ -31,13 +33,16 @@ class UnifiedLLM(BaseLLM):
             max_tokens=max_tokens,
             system_prompt=system_prompt
         )
+        # System prompt messages are identical on every turn, build them once
+        self._preamble: List[ChatMessage] = []
+        self._preamble_prompt: Optional[str] = None
         self._initialize_model()
 
     def _initialize_model(self) -> None:
         try:
             
             if self.model_name.lower() == "gemini":
-                global_settings = Settings()
+                global_settings = get_settings()
                 self.model = Gemini(
                     api_key=self.api_key if self.api_key else global_settings.GEMINI_CONFIG.api_key,
                     model=self.model_id if self.model_id else global_settings.GEMINI_CONFIG.model_id,
@@ -76,17 +81,24 @@ class UnifiedLLM(BaseLLM):
         query: str,
         chat_history: Optional[List[ChatMessage]] = None
     ) -> List[ChatMessage]:
-        messages = []
-        if self.system_prompt:
-            messages.append(ChatMessage(role="system", content=self.system_prompt))
-            messages.append(ChatMessage(role="assistant", content="I understand and will follow these instructions."))
+        messages = list(self._get_preamble())
         
         if chat_history:
             messages.extend(chat_history)
         
-        messages.append(ChatMessage(role="user", content=query))
+        messages.append(ChatMessage(role=MessageRole.USER, content=query))
         return messages
 
+    def _get_preamble(self) -> List[ChatMessage]:
+        """System prompt messages, rebuilt only when the system prompt changes"""
+        if self.system_prompt != self._preamble_prompt:
+            self._preamble = [
+                ChatMessage(role=MessageRole.SYSTEM, content=self.system_prompt),
+                ChatMessage(role=MessageRole.ASSISTANT, content=SYSTEM_PROMPT_ACKNOWLEDGEMENT),
+            ] if self.system_prompt else []
+            self._preamble_prompt = self.system_prompt
+        return self._preamble
+
     def _extract_response(self, response) -> str:
         """Trích xuất text từ response của model."""
         try:
@@ -100,6 +112,13 @@ class UnifiedLLM(BaseLLM):
             logger.error(f"Error extracting response from {self.model_name}: {str(e)}")
             return response.message.content
 
+    def _extract_delta(self, response) -> str:
+        """Streamed responses carry the accumulated message, only the new text is yielded"""
+        delta = getattr(response, 'delta', None)
+        if delta is not None:
+            return delta
+        return self._extract_response(response)
+
     def chat(
         self,
         query: str,
@@ -135,7 +154,7 @@ class UnifiedLLM(BaseLLM):
             messages = self._prepare_messages(query, chat_history)
             response_stream = self.model.stream_chat(messages)
             for response in response_stream:
-                yield self._extract_response(response)
+                yield self._extract_delta(response)
         except Exception as e:
             logger.error(f"Error in {self.model_name} stream chat: {str(e)}")
             raise
@@ -154,7 +173,7 @@ class UnifiedLLM(BaseLLM):
             
             if hasattr(response, '__aiter__'):
                 async for chunk in response:
-                    yield self._extract_response(chunk)
+                    yield self._extract_delta(chunk)
             else:
                 yield self._extract_response(response)
                 
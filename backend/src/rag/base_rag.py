@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-import json
+import asyncio
 from typing import List, Optional
 import uuid
+import numpy as np
 from fastembed import SparseTextEmbedding
 from tqdm import tqdm
 from qdrant_client.http import models
@@ -9,6 +10,7 @@ from llama_index.core import Document, Settings
 from llama_index.llms.gemini import Gemini
 # from llama_index.embeddings.gemini import GeminiEmbedding
 from .embed.gemini_embedding_model import GeminiEmbedding
+from src.cache import get_embedding_cache
 from llama_index.core.node_parser import SimpleNodeParser
 from llama_index.core.schema import NodeWithScore
 from src.db.qdrant import QdrantVectorDatabase
@@ -27,9 +29,14 @@ class BaseRAG(ABC):
         gemini_api_key: str,
         chunk_size: int = 512,
         chunk_overlap: int = 64,
+        batch_size: int = 32,
+        max_concurrency: int = 4,
+        quantization: str = "scalar",
     ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
         
         # Initialize Gemini models
         self.llm = Gemini(
@@ -40,7 +47,9 @@ class BaseRAG(ABC):
             api_key=gemini_api_key,
             model_name="models/text-embedding-004",
            # gemini-embedding-exp-03-07 
-            output_dimensionality=768
+            output_dimensionality=768,
+            embed_batch_size=batch_size,
+            cache=get_embedding_cache()
         )
         self.sparse_embedding_model = SparseTextEmbedding(model_name="Qdrant/bm25",lazy_load=True)
         
@@ -53,10 +62,16 @@ class BaseRAG(ABC):
         # Initialize document parser
         self.parser = SimpleNodeParser.from_defaults()
         
-        # Initialize Qdrant client
-        self.qdrant_client = QdrantVectorDatabase(url=qdrant_url)
+        # Initialize Qdrant client, the pipeline only calls it from worker threads
+        self.qdrant_client = QdrantVectorDatabase(url=qdrant_url, quantization=quantization, use_async_client=False)
         
         logger.info(f"Initialized {self.__class__.__name__}")
+
+    def close(self):
+        """
+        Release the Qdrant connections of the pipeline
+        """
+        self.qdrant_client.close()
     def split_document(
         self,
         document: Document,
@@ -82,6 +97,19 @@ class BaseRAG(ABC):
             chunks.append(chunk)
             
         return chunks
+    def split_documents(
+        self,
+        documents: List[Document],
+        show_progress: bool = True
+    ) -> List[Document]:
+        """
+        Split several documents into one flat list of chunks
+        """
+        chunks = []
+        for document in documents:
+            chunks.extend(self.split_document(document, show_progress=show_progress))
+        return chunks
+
     def process_document(
         self,
         document: str,
@@ -90,47 +118,168 @@ class BaseRAG(ABC):
         metadata: Optional[dict] = None,
         show_progress: bool = True,
     ) -> List[Document]:
+        return self.process_documents(
+            documents=[Document(text=document, metadata=metadata or {})],
+            collection_name=collection_name,
+            document_id=document_id,
+            show_progress=show_progress,
+        )
+
+    def process_documents(
+        self,
+        documents: List[Document],
+        collection_name: str,
+        document_id: Optional[str] | Optional[int] = None,
+        show_progress: bool = True,
+    ) -> List[Document]:
+        """
+        Split documents into chunks, embed them in batches and index them
+
+        Chunks of all documents are accumulated first so every embedding request
+        and Qdrant upsert carries up to `batch_size` chunks instead of one.
+        """
         if document_id is None:
             document_id = str(uuid.uuid4())
 
         try:
-            doc = Document(text=document, metadata=metadata or {})
-            chunks = self.split_document(doc, show_progress=show_progress)
+            chunks = self.split_documents(documents, show_progress=show_progress)
+            if not chunks:
+                return chunks
+
+            # Ensure collection exists
+            self.ensure_collection(collection_name, self.dense_embedding_model.output_dimensionality)
 
             # Index chunks
-            chunks_iter = tqdm(chunks, desc="Indexing...") if show_progress else chunks
-            for chunk in chunks_iter:
-                dense_embedding = self.dense_embedding_model.get_text_embedding(chunk.text)
-                sparse_embedding = self.sparse_embedding_model.embed(chunk.text)
-                sparse_embedding = list(sparse_embedding)[0].as_object()
-                # Ensure collection exists
-                if chunk == chunks[0]:  # Only check on first chunk
-                    self.ensure_collection(collection_name, len(dense_embedding))
-
-                payload = QdrantPayload(
-                    document_id=document_id,
-                    text=chunk.text,
-                    vector_id=chunk.metadata["chunk_id"],
-                )
+            batch_starts = range(0, len(chunks), self.batch_size)
+            batch_iter = tqdm(batch_starts, desc="Indexing...") if show_progress else batch_starts
+            for start in batch_iter:
+                batch = chunks[start:start + self.batch_size]
+                self._index_chunks(batch, collection_name, document_id)
 
-                self.qdrant_client.add_vector(
-                    collection_name=collection_name,
-                    vector_id=chunk.metadata["chunk_id"],
-                    dense_vector=dense_embedding,
-                    sparse_vector=sparse_embedding,
-                    payload=payload,
-                )
-                chunk.metadata["dense_embedding"] = json.dumps(dense_embedding)
-                chunk.metadata["sparse_embedding"] = json.dumps({key: value.tolist() for key, value in sparse_embedding.items()})
+            logger.info(
+                f"Successfully processed document {document_id} with {len(chunks)} chunks"
+            )
+            return chunks
 
-                logger.info(
-                    f"Successfully processed document {document_id} with chunk {chunk.metadata['chunk_id']}"
-                )
-            return chunks_iter
+        except Exception as e:
+            logger.error(f"Error processing document: {str(e)}")
+            raise
+
+    async def aprocess_documents(
+        self,
+        documents: List[Document],
+        collection_name: str,
+        document_id: Optional[str] | Optional[int] = None,
+        show_progress: bool = True,
+        flush_timeout: float = 0.5,
+    ) -> List[Document]:
+        """
+        Async version of `process_documents`, pipelining splitting and indexing
+
+        A producer splits the documents one by one and feeds the chunks into a
+        queue while `max_concurrency` consumers embed and upsert them in batches
+        of `batch_size`, so indexing starts before all documents are split. A
+        partial batch is flushed once the queue stays empty for `flush_timeout`.
+        """
+        if document_id is None:
+            document_id = str(uuid.uuid4())
+
+        chunks: List[Document] = []
+        queue: asyncio.Queue[Optional[Document]] = asyncio.Queue()
+
+        async def produce():
+            try:
+                for document in documents:
+                    document_chunks = await asyncio.to_thread(self.split_document, document, show_progress)
+                    chunks.extend(document_chunks)
+                    for chunk in document_chunks:
+                        queue.put_nowait(chunk)
+            finally:
+                # One sentinel per consumer
+                for _ in range(self.max_concurrency):
+                    queue.put_nowait(None)
+
+        async def index(batch: List[Document]):
+            await asyncio.to_thread(self._index_chunks, batch, collection_name, document_id)
+
+        async def consume():
+            batch: List[Document] = []
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(queue.get(), timeout=flush_timeout if batch else None)
+                except asyncio.TimeoutError:
+                    # Producer is still splitting, index the partial batch meanwhile
+                    await index(batch)
+                    batch = []
+                    continue
+                if chunk is None:
+                    break
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    await index(batch)
+                    batch = []
+            if batch:
+                await index(batch)
+
+        try:
+            # Ensure collection exists
+            await asyncio.to_thread(
+                self.ensure_collection, collection_name, self.dense_embedding_model.output_dimensionality
+            )
+
+            tasks = [asyncio.create_task(produce())] + [
+                asyncio.create_task(consume()) for _ in range(self.max_concurrency)
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            logger.info(
+                f"Successfully processed document {document_id} with {len(chunks)} chunks"
+            )
+            return chunks
 
         except Exception as e:
             logger.error(f"Error processing document: {str(e)}")
             raise
+
+    def _index_chunks(
+        self,
+        chunks: List[Document],
+        collection_name: str,
+        document_id: str | int,
+    ):
+        """
+        Embed a batch of chunks and upsert them into Qdrant with one request each
+        """
+        texts = [chunk.text for chunk in chunks]
+        dense_embeddings = self.dense_embedding_model.get_text_embedding_batch(texts)
+        sparse_embeddings = [
+            embedding.as_object()
+            for embedding in self.sparse_embedding_model.embed(texts, batch_size=self.batch_size)
+        ]
+
+        self.qdrant_client.add_vectors(
+            collection_name=collection_name,
+            vector_ids=[chunk.metadata["chunk_id"] for chunk in chunks],
+            dense_vectors=dense_embeddings,
+            sparse_vectors=sparse_embeddings,
+            payloads=[
+                QdrantPayload(
+                    document_id=document_id,
+                    text=chunk.text,
+                    vector_id=chunk.metadata["chunk_id"],
+                )
+                for chunk in chunks
+            ],
+        )
+        for chunk, dense_embedding, sparse_embedding in zip(chunks, dense_embeddings, sparse_embeddings):
+            # Raw float32 bytes, 4 bytes per dimension instead of a decimal JSON string
+            chunk.metadata["dense_embedding"] = np.asarray(dense_embedding, dtype=np.float32).tobytes()
+            chunk.metadata["sparse_embedding"] = {key: value.tolist() for key, value in sparse_embedding.items()}
+
     def ensure_collection(self, collection_name: str, vector_size: int):
         """
         Ensure collection exists in vector store
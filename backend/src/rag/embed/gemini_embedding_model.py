@@ -4,6 +4,7 @@ import os
 from typing import Any, Dict, List, Optional
 
 import google.generativeai as gemini
+import numpy as np
 from llama_index.core.base.embeddings.base import (
     DEFAULT_EMBED_BATCH_SIZE,
     BaseEmbedding,
@@ -11,6 +12,8 @@ from llama_index.core.base.embeddings.base import (
 from llama_index.core.bridge.pydantic import Field, PrivateAttr
 from llama_index.core.callbacks.base import CallbackManager
 
+from src.cache import EmbeddingCache
+
 
 class GeminiEmbedding(BaseEmbedding):
     """Google Gemini embeddings.
@@ -22,9 +25,12 @@ class GeminiEmbedding(BaseEmbedding):
         api_key (Optional[str]): API key to access the model. Defaults to None.
         api_base (Optional[str]): API base to access the model. Defaults to Official Base.
         transport (Optional[str]): Transport to access the model.
+        cache (Optional[EmbeddingCache]): Cache consulted before calling the API.
+        normalize (bool): L2-normalize the returned embeddings. Defaults to True.
     """
 
     _model: Any = PrivateAttr()
+    _cache: Optional[EmbeddingCache] = PrivateAttr(default=None)
     title: Optional[str] = Field(
         default="",
         description="Title is only applicable for retrieval_document tasks, and is used to represent a document title. For other tasks, title is invalid.",
@@ -41,6 +47,10 @@ class GeminiEmbedding(BaseEmbedding):
         default=768,
         description="Output dimensionality of the model.",
     )
+    normalize: bool = Field(
+        default=True,
+        description="Whether to L2-normalize the embeddings, truncated Gemini embeddings are not unit length.",
+    )
 
     def __init__(
         self,
@@ -53,6 +63,8 @@ class GeminiEmbedding(BaseEmbedding):
         embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
         output_dimensionality: int = 768,
         callback_manager: Optional[CallbackManager] = None,
+        cache: Optional[EmbeddingCache] = None,
+        normalize: bool = True,
         **kwargs: Any,
     ):
         # API keys are optional. The API can be authorised via OAuth (detected
@@ -73,10 +85,12 @@ class GeminiEmbedding(BaseEmbedding):
             callback_manager=callback_manager,
             title=title,
             task_type=task_type,
+            normalize=normalize,
             **kwargs,
         )
         gemini.configure(**config_params)
         self._model = gemini
+        self._cache = cache
         self.output_dimensionality = output_dimensionality
 
     @classmethod
@@ -85,36 +99,50 @@ class GeminiEmbedding(BaseEmbedding):
 
     def _get_query_embedding(self, query: str) -> List[float]:
         """Get query embedding."""
-        return self._model.embed_content(
-            model=self.model_name,
-            content=query,
-            title=self.title,
-            task_type=self.task_type,
-            output_dimensionality=self.output_dimensionality
-        )["embedding"]
+        return self._get_text_embeddings([query])[0]
 
     def _get_text_embedding(self, text: str) -> List[float]:
         """Get text embedding."""
-        return self._model.embed_content(
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Get text embeddings in a single batched request, skipping cached texts."""
+        if self._cache is None:
+            return self._embed(texts)
+
+        namespace = f"{self.model_name}|{self.task_type}|{self.output_dimensionality}"
+        keys = [EmbeddingCache.make_key(text, namespace) for text in texts]
+        embeddings: List[Optional[List[float]]] = []
+        for key in keys:
+            cached = self._cache.get(key)
+            embeddings.append(cached.tolist() if cached is not None else None)
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            for i, embedding in zip(missing, self._embed([texts[i] for i in missing])):
+                self._cache.put(keys[i], embedding)
+                embeddings[i] = embedding
+        return embeddings
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Call the embedding API for a batch of texts."""
+        response = self._model.embed_content(
             model=self.model_name,
-            content=text,
+            content=texts,
             title=self.title,
             task_type=self.task_type,
             output_dimensionality=self.output_dimensionality
-        )["embedding"]
+        )
+        return self._postprocess(response["embedding"])
 
-    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Get text embeddings."""
-        return [
-            self._model.embed_content(
-                model=self.model_name,
-                content=text,
-                title=self.title,
-                task_type=self.task_type,
-                output_dimensionality=self.output_dimensionality
-            )["embedding"]
-            for text in texts
-        ]
+    def _postprocess(self, embeddings: List[List[float]]) -> List[List[float]]:
+        """Normalize the whole batch at once as a (n, dim) float32 matrix."""
+        if not self.normalize or not embeddings:
+            return embeddings
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, 1e-12)
+        return matrix.tolist()
 
     async def _aget_query_embedding(self, query: str) -> List[float]:
         """The asynchronous version of _get_query_embedding."""
@@ -133,4 +161,4 @@ class GeminiEmbedding(BaseEmbedding):
             task_type=self.task_type,
             output_dimensionality=self.output_dimensionality
         )
-        return response["embedding"]
+        return self._postprocess(response["embedding"])
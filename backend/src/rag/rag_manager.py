@@ -1,5 +1,7 @@
 # rag_manager.py
+import threading
 from typing import Optional, Type
+from cachetools import LRUCache
 from src.logger import get_formatted_logger
 from .base_rag import BaseRAG
 from .naive_rag import NaiveRAG
@@ -9,6 +11,13 @@ from .fusion_rag import FusionRAG
 from src.db.models import RAGType
 logger = get_formatted_logger(__file__)
 
+# Building a RAG pipeline creates its models and Qdrant client, instances only
+# depend on their arguments so they are shared. Bounded so idle configs are released;
+# an evicted instance is not closed, an ingestion or agent tool may still be using
+# it, its sync client is released with it once the last user drops it
+rag_cache: LRUCache = LRUCache(maxsize=32)
+rag_cache_lock = threading.Lock()
+
 
 class RAGManager:
     """
@@ -84,6 +93,38 @@ class RAGManager:
             logger.error(f"Error creating RAG instance: {str(e)}")
             raise
 
+    @classmethod
+    def get_rag(
+        cls,
+        rag_type: RAGType,
+        qdrant_url: str,
+        gemini_api_key: str,
+        **kwargs
+    ) -> BaseRAG:
+        """
+        Get the shared RAG instance built with these arguments, creating it on first use
+
+        Args:
+            rag_type: The type of RAG to get
+            qdrant_url: URL for Qdrant server
+            gemini_api_key: API key for Gemini
+            **kwargs: Additional arguments to pass to the RAG implementation
+
+        Returns:
+            A RAG instance
+        """
+        key = (rag_type, qdrant_url, gemini_api_key, tuple(sorted(kwargs.items())))
+        with rag_cache_lock:
+            rag_instance = rag_cache.get(key)
+        if rag_instance is None:
+            built_instance = cls.create_rag(rag_type, qdrant_url, gemini_api_key, **kwargs)
+            with rag_cache_lock:
+                rag_instance = rag_cache.setdefault(key, built_instance)
+            # Another thread cached its instance first
+            if rag_instance is not built_instance:
+                built_instance.close()
+        return rag_instance
+
     @classmethod
     def register_implementation(
         cls,
@@ -34,8 +34,12 @@ class FileExtractor:
     def __init__(self) -> None:
         self.extractor = get_extractor()
 
-    def get_extractor_for_file(self, file_path: str | Path) -> dict[str, str]:
-        file_suffix = Path(file_path).suffix
+    def get_extractor_for_file(self, file_path: str | Path) -> dict[str, str] | None:
+        """Get the extractor of a file path or a bare extension, None if unsupported"""
+        # Path(".pdf").suffix is empty, a bare extension is used as is
+        file_suffix = Path(file_path).suffix or str(file_path)
+        if file_suffix not in self.extractor:
+            return None
         return {
             file_suffix: self.extractor[file_suffix],
         }
@@ -9,6 +9,9 @@ from llama_index.core.readers.base import BaseReader
 from theflow.settings import settings as flowsettings
 
 from src.readers.base import Document
+from src.logger import get_formatted_logger
+
+logger = get_formatted_logger(__file__)
 
 class HtmlReader(BaseReader):
     """Reader HTML usimg html2text
@@ -154,9 +157,8 @@ class MhtmlReader(BaseReader):
                     if text:
                         page.append(text)
         # save the page into markdown format
-        print(self.cache_dir)
         if self.cache_dir is not None:
-            print(Path(self.cache_dir) / f"{file_name.stem}.md")
+            logger.debug("Saving page to %s", Path(self.cache_dir) / f"{file_name.stem}.md")
             with open(Path(self.cache_dir) / f"{file_name.stem}.md", "w") as f:
                 f.write(page[0])
 
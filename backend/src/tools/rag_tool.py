@@ -1,14 +1,33 @@
+import re
+import threading
+from cachetools import LRUCache
 from llama_index.core.tools import FunctionTool
 from src.db.models import KnowledgeBase,RAGConfig, RAGType
-from src.config import Settings
+from src.config import get_settings
 from typing import List
 from src.logger import get_formatted_logger
 logger = get_formatted_logger(__file__)
+
+# A tool only captures its knowledge base and RAG config, agents sharing a knowledge
+# base (or rebuilt after an LLM config change) reuse it. Keyed on both rows' versions
+rag_tool_cache: LRUCache = LRUCache(maxsize=256)
+rag_tool_cache_lock = threading.Lock()
+
+# Function names accepted by the LLM providers: letters, digits, '_' and '-', at most 64
+TOOL_NAME_INVALID_CHARS = re.compile(r"[^a-z0-9_-]+")
+# Every RAG tool name starts with it, other tools are told apart by it
+RAG_TOOL_NAME_PREFIX = "search_kb_"
+
+def make_rag_tool_name(knowledge_base: KnowledgeBase) -> str:
+    """Build a provider-safe tool name from the knowledge base name, unique through its id"""
+    slug = TOOL_NAME_INVALID_CHARS.sub("_", knowledge_base.name.lower()).strip("_")[:40]
+    return f"{RAG_TOOL_NAME_PREFIX}{knowledge_base.id}_{slug}" if slug else f"{RAG_TOOL_NAME_PREFIX}{knowledge_base.id}"
+
 class RAGToolManager:
     @staticmethod
     def create_rag_tool_for_knowledge_base(knowledge_base: KnowledgeBase) -> FunctionTool:
         """Create a RAG function tool for a specific knowledge base"""
-        settings = Settings()
+        settings = get_settings()
         
         # Get RAG config from knowledge base
         rag_config:RAGConfig = knowledge_base.rag_config
@@ -25,12 +44,16 @@ class RAGToolManager:
             """
             from src.rag.rag_manager import RAGManager
             
-            rag_manager = RAGManager.create_rag(
+            rag_manager = RAGManager.get_rag(
                 rag_type=rag_type,
                 qdrant_url=settings.QDRANT_URL,
                 gemini_api_key=settings.GEMINI_CONFIG.api_key,
                 chunk_size=rag_config.chunk_size,
                 chunk_overlap=rag_config.chunk_overlap,
+                # Same arguments as the knowledge base service, so the instance is shared
+                batch_size=settings.RAG_CONFIG.batch_size,
+                max_concurrency=settings.RAG_CONFIG.max_concurrency,
+                quantization=settings.RAG_CONFIG.quantization,
             )
             
             # Use knowledge_base.specific_id as collection name or other identifier
@@ -44,15 +67,39 @@ class RAGToolManager:
         logger.info(f"Created RAG tool for knowledge base: {knowledge_base.name} with RAG type: {rag_type}")
         # Create function tool with proper name and description
         return FunctionTool.from_defaults(
-            name=f"search_{knowledge_base.name.lower().replace(' ', '_')}",
+            name=make_rag_tool_name(knowledge_base),
             description=f"Search through the '{knowledge_base.name}' knowledge base: {knowledge_base.description}",
             fn=search_kb
         )
     
+    @staticmethod
+    def get_rag_tool_for_knowledge_base(knowledge_base: KnowledgeBase) -> FunctionTool:
+        """Get the RAG tool of a knowledge base, creating it if its rows changed since"""
+        rag_config = knowledge_base.rag_config
+        key = (knowledge_base.id, knowledge_base.updated_at, rag_config.id, rag_config.updated_at)
+        with rag_tool_cache_lock:
+            tool = rag_tool_cache.get(key)
+        if tool is None:
+            tool = RAGToolManager.create_rag_tool_for_knowledge_base(knowledge_base)
+            with rag_tool_cache_lock:
+                tool = rag_tool_cache.setdefault(key, tool)
+        return tool
+
     @staticmethod
     def create_rag_tools_for_agent(knowledge_bases: List[KnowledgeBase]) -> List[FunctionTool]:
         """Create RAG tools for all knowledge bases associated with an agent"""
         return [
-            RAGToolManager.create_rag_tool_for_knowledge_base(kb) 
+            RAGToolManager.get_rag_tool_for_knowledge_base(kb) 
             for kb in knowledge_bases
-        ]
\ No newline at end of file
+        ]
+
+    @staticmethod
+    def is_rag_tool(tool: FunctionTool) -> bool:
+        """Whether the tool is a knowledge base search built by this manager"""
+        return tool.metadata.name.startswith(RAG_TOOL_NAME_PREFIX)
+
+    @staticmethod
+    def clear_cache() -> None:
+        """Drop the cached tools, e.g. after a knowledge base was deleted"""
+        with rag_tool_cache_lock:
+            rag_tool_cache.clear()
\ No newline at end of file
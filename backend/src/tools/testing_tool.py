@@ -1,5 +1,5 @@
 from src.rag.rag_manager import RAGManager
-from src.config import Settings
+from src.config import get_settings
 from src.db.models import RAGType
 # Example RAG Tool implementation
 def get_weather(location: str, unit: str = "celsius") -> dict:
@@ -17,7 +17,7 @@ def retrieve_documents(query: str) -> str:
     Args:
         query: Search query
     """
-    settings = Settings()
+    settings = get_settings()
     rag_manager = RAGManager.create_rag(
             rag_type=RAGType.HYBRID,
             qdrant_url=settings.QDRANT_URL,
@@ -192,23 +192,47 @@ export default function ChatComponent() {
         )
       };
 
-      const response = await fetch(`${BACKEND_API_URL}/chat/chat`, {
+      const response = await fetch(`${BACKEND_API_URL}/chat/chat/stream`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(messageData),
       });
       
-      if (!response.ok) throw new Error('Failed to send message');
-      const newMessage = await response.json();
-      
-      setMessages(prev => {
-        const filtered = prev.filter(msg => !msg.pending);
-        return [...filtered, {
-          role: 'assistant',
-          content: newMessage.content,
-          id: newMessage.id
-        }];
-      });
+      if (!response.ok || !response.body) throw new Error('Failed to send message');
+
+      // Read the Server-Sent Events and grow the pending message token by token
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let content = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop() ?? '';
+        for (const event of events) {
+          const lines = event.split('\n');
+          const name = lines.find(line => line.startsWith('event: '))?.slice(7) ?? 'message';
+          const data = lines.find(line => line.startsWith('data: '))?.slice(6);
+          if (!data) continue;
+          const payload = JSON.parse(data);
+          if (name === 'error') throw new Error(payload.detail);
+          if (name === 'done') {
+            setMessages(prev => {
+              const filtered = prev.filter(msg => !msg.pending);
+              return [...filtered, {
+                role: 'assistant',
+                content: payload.content,
+                id: payload.id
+              }];
+            });
+            continue;
+          }
+          content += payload.content;
+          setMessages(prev => prev.map(msg => msg.pending ? { ...msg, content } : msg));
+        }
+      }
     } catch (error) {
       setError('Failed to send message');
       console.error('Error:', error);
@@ -107,6 +107,13 @@ const KnowledgeBaseComponent: React.FC = () => {
     }
   };
 
+  // Documents are processed in the background, poll until none is left processing
+  useEffect(() => {
+    if (!selectedKB || !documents.some(doc => doc.status === 'processing')) return;
+    const timer = setTimeout(() => fetchDocuments(selectedKB.id), 3000);
+    return () => clearTimeout(timer);
+  }, [documents, selectedKB]);
+
   const handleCreateKB = async () => {
     try {
       const response = await fetch(`${BACKEND_API_URL}/kb/`, {